@@ -0,0 +1,114 @@
+import codecs
+import csv
+import json
+from collections import deque
+from enum import Enum
+from typing import AsyncIterable, AsyncIterator, Type
+
+from pydantic import BaseModel, ValidationError
+
+Record = tuple[int, dict | None, str | None]
+
+
+class ImportFormat(str, Enum):
+    ndjson = 'ndjson'
+    csv = 'csv'
+
+
+class _Feed:
+    # the csv reader pulls from an iterator: it is handed one complete record at a time
+    def __init__(self):
+        self.pending: deque[str] = deque()
+
+    def __iter__(self) -> '_Feed':
+        return self
+
+    def __next__(self) -> str:
+        if not self.pending:
+            raise StopIteration
+        return self.pending.popleft()
+
+
+async def decode_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    # only the current chunk and the unfinished line are held in memory
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in chunks:
+        *lines, pending = (pending + decoder.decode(chunk)).split('\n')
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+async def _csv_records(lines: AsyncIterable[str]) -> AsyncIterator[str]:
+    # quoted values may span lines: a record ends once its quotes are balanced
+    record, quotes = '', 0
+    async for line in lines:
+        record += line
+        quotes += line.count('"')
+        if quotes % 2 == 0:
+            yield record
+            record, quotes = '', 0
+    if record:
+        yield record
+
+
+async def read_records(
+    lines: AsyncIterable[str], import_format: ImportFormat
+) -> AsyncIterator[Record]:
+    row_no = 0
+    if import_format == ImportFormat.csv:
+        feed = _Feed()
+        reader = csv.DictReader(feed)
+        async for record in _csv_records(lines):
+            feed.pending.append(record)
+            try:
+                row = next(reader)
+            except StopIteration:
+                # the header or a blank line
+                continue
+            row_no += 1
+            if None in row:
+                yield row_no, None, 'Лишние значения в строке'
+            else:
+                yield row_no, row, None
+        return
+
+    async for line in lines:
+        if not line.strip():
+            continue
+        row_no += 1
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield row_no, None, 'Некорректный JSON'
+            continue
+        if not isinstance(record, dict):
+            yield row_no, None, 'Ожидается JSON-объект'
+            continue
+        yield row_no, record, None
+
+
+def _describe(error: dict) -> str:
+    location = '.'.join(str(part) for part in error['loc'])
+    return f'{location}: {error["msg"]}' if location else error['msg']
+
+
+class RecordValidator:
+    def __init__(self, schema: Type[BaseModel]):
+        self.schema = schema
+        self.total = 0
+        self.errors: list[tuple[int, str]] = []
+
+    async def __call__(self, records: AsyncIterable[Record]) -> AsyncIterator[tuple[int, dict]]:
+        async for row_no, record, error in records:
+            self.total += 1
+            if error is None:
+                try:
+                    yield row_no, self.schema.model_validate(record).model_dump()
+                    continue
+                except ValidationError as exc:
+                    error = '; '.join(_describe(item) for item in exc.errors())
+            self.errors.append((row_no, error))
@@ -0,0 +1,215 @@
+from bisect import bisect_left
+from typing import Iterable, Iterator
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self) -> Iterator[tuple[str, int]]:
+        total = 0
+        for bound, count in zip((*map(str, self.buckets), '+Inf'), self.counts):
+            total += count
+            yield bound, total
+
+
+class RouteMetrics:
+    __slots__ = ('duration', 'size', 'statuses', 'errors', 'db_statements', 'db_seconds')
+
+    def __init__(self):
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+        self.statuses: dict[int, int] = {}
+        self.errors = 0
+        self.db_statements = 0
+        self.db_seconds = 0.0
+
+
+class HttpMetrics:
+    def __init__(self):
+        self.in_flight = 0
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+
+    def observe(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        size: int,
+        db_statements: int,
+        db_seconds: float,
+    ) -> None:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[method, route] = RouteMetrics()
+        metrics.duration.observe(duration)
+        metrics.size.observe(size)
+        metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+        if status >= 500:
+            metrics.errors += 1
+        metrics.db_statements += db_statements
+        metrics.db_seconds += db_seconds
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + '}'
+
+
+class Exposition:
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def metric(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def sample(self, name: str, value: float, **labels) -> None:
+        self.lines.append(f'{name}{_labels(**labels)} {value}')
+
+    def histogram(self, name: str, buckets: Iterable[tuple[str, int]], sum_: float, **labels):
+        count = 0
+        for bound, count in buckets:
+            self.sample(f'{name}_bucket', count, **labels, le=bound)
+        self.sample(f'{name}_sum', sum_, **labels)
+        self.sample(f'{name}_count', count, **labels)
+
+    def render(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+def _http(exposition: Exposition, http: HttpMetrics) -> None:
+    routes = sorted(http.routes.items())
+    exposition.metric('http_requests_in_flight', 'gauge', 'Requests being handled')
+    exposition.sample('http_requests_in_flight', http.in_flight)
+
+    exposition.metric('http_requests_total', 'counter', 'Handled requests')
+    for (method, route), metrics in routes:
+        for status, count in sorted(metrics.statuses.items()):
+            exposition.sample(
+                'http_requests_total', count, method=method, route=route, status=status
+            )
+
+    exposition.metric('http_request_errors_total', 'counter', 'Requests answered with 5xx')
+    for (method, route), metrics in routes:
+        exposition.sample('http_request_errors_total', metrics.errors, method=method, route=route)
+
+    exposition.metric('http_request_duration_seconds', 'histogram', 'Request latency')
+    for (method, route), metrics in routes:
+        exposition.histogram(
+            'http_request_duration_seconds',
+            metrics.duration.cumulative(),
+            metrics.duration.sum,
+            method=method,
+            route=route,
+        )
+
+    exposition.metric('http_response_size_bytes', 'histogram', 'Response body size')
+    for (method, route), metrics in routes:
+        exposition.histogram(
+            'http_response_size_bytes',
+            metrics.size.cumulative(),
+            metrics.size.sum,
+            method=method,
+            route=route,
+        )
+
+    exposition.metric('http_request_db_statements_total', 'counter', 'SQL statements issued')
+    for (method, route), metrics in routes:
+        exposition.sample(
+            'http_request_db_statements_total', metrics.db_statements, method=method, route=route
+        )
+
+    exposition.metric('http_request_db_seconds_total', 'counter', 'Time spent in SQL')
+    for (method, route), metrics in routes:
+        exposition.sample(
+            'http_request_db_seconds_total', metrics.db_seconds, method=method, route=route
+        )
+
+
+def _pool(exposition: Exposition, pool: dict) -> None:
+    for key in ('size', 'max_overflow', 'in_use', 'idle', 'overflow'):
+        exposition.metric(f'db_pool_{key}', 'gauge', f'Connection pool {key.replace("_", " ")}')
+        exposition.sample(f'db_pool_{key}', pool[key])
+    for key in ('checkouts', 'timeouts'):
+        exposition.metric(f'db_pool_{key}_total', 'counter', f'Connection pool {key}')
+        exposition.sample(f'db_pool_{key}_total', pool[key])
+    exposition.metric('db_pool_wait_seconds', 'histogram', 'Time spent waiting for a connection')
+    exposition.histogram(
+        'db_pool_wait_seconds', pool['wait_buckets'].items(), pool['wait_seconds_total']
+    )
+
+
+def _replicas(exposition: Exposition, replicas: list[dict]) -> None:
+    exposition.metric('db_replica_lag_seconds', 'gauge', 'Replication lag, absent when unknown')
+    for replica in replicas:
+        if replica['lag'] is not None:
+            exposition.sample('db_replica_lag_seconds', replica['lag'], url=replica['url'])
+    exposition.metric('db_replica_healthy', 'gauge', 'Replica usable for reads')
+    for replica in replicas:
+        exposition.sample('db_replica_healthy', int(replica['healthy']), url=replica['url'])
+
+
+def _cache(exposition: Exposition, cache: dict) -> None:
+    for key in ('size', 'maxsize'):
+        exposition.metric(f'entity_cache_{key}', 'gauge', f'Entity cache {key}')
+        exposition.sample(f'entity_cache_{key}', cache[key])
+    for key in ('hits', 'misses', 'evictions', 'expirations', 'invalidations'):
+        exposition.metric(f'entity_cache_{key}_total', 'counter', f'Entity cache {key}')
+        exposition.sample(f'entity_cache_{key}_total', cache[key])
+    lookups = cache['hits'] + cache['misses']
+    exposition.metric('entity_cache_hit_ratio', 'gauge', 'Entity cache hits per lookup')
+    exposition.sample('entity_cache_hit_ratio', cache['hits'] / lookups if lookups else 0.0)
+
+
+def _admission(exposition: Exposition, bulkheads: list[dict], rate_limited: int) -> None:
+    for key in ('limit', 'active', 'queued'):
+        exposition.metric(f'bulkhead_{key}', 'gauge', f'Bulkhead {key} requests')
+        for bulkhead in bulkheads:
+            exposition.sample(f'bulkhead_{key}', bulkhead[key], group=bulkhead['name'])
+    exposition.metric('bulkhead_rejected_total', 'counter', 'Requests shed with 503')
+    for bulkhead in bulkheads:
+        exposition.sample('bulkhead_rejected_total', bulkhead['rejected'], group=bulkhead['name'])
+    exposition.metric('rate_limit_rejected_total', 'counter', 'Requests refused with 429')
+    exposition.sample('rate_limit_rejected_total', rate_limited)
+
+
+def render(
+    http: HttpMetrics,
+    pool: dict | None,
+    replicas: list[dict],
+    cache: dict | None,
+    bulkheads: list[dict],
+    rate_limited: int,
+) -> str:
+    exposition = Exposition()
+    _http(exposition, http)
+    _admission(exposition, bulkheads, rate_limited)
+    if pool is not None:
+        _pool(exposition, pool)
+    if replicas:
+        _replicas(exposition, replicas)
+    if cache is not None:
+        _cache(exposition, cache)
+    return exposition.render()
+
+
+http_metrics = HttpMetrics()
@@ -0,0 +1,130 @@
+import json
+import logging
+import time
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.adapters.metrics import UNMATCHED_ROUTE, HttpMetrics
+from app.infrastructure.instrumentation import QueryStats, query_stats
+from app.infrastructure.replicas import Consistency, consistency, parse_lsn
+
+access_logger = logging.getLogger('app.access')
+
+CONSISTENCY_HEADER = 'X-Consistency-Token'
+CONSISTENCY_COOKIE = 'consistency_token'
+
+
+def _server_timing(stats: QueryStats, started: float) -> str:
+    total = (time.perf_counter() - started) * 1000
+    return (
+        f'db;dur={stats.duration * 1000:.2f};desc="{stats.statements} queries", '
+        f'app;dur={total:.2f}'
+    )
+
+
+def _route(scope: Scope) -> str:
+    # the router stores the matched route in the scope; raw paths would explode cardinality
+    route = scope.get('route')
+    return route.path if route is not None else UNMATCHED_ROUTE
+
+
+class InstrumentationMiddleware:
+    def __init__(
+        self, app: ASGIApp, metrics: HttpMetrics | None = None, access_log: bool = True
+    ):
+        self.app = app
+        self.metrics = metrics
+        self.access_log = access_log
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = query_stats.set(stats)
+        started = time.perf_counter()
+        status, size = 500, 0
+
+        async def send_instrumented(message: Message) -> None:
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                # streamed bodies keep querying after this point; the access log has the totals
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', _server_timing(stats, started))
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        if self.metrics is not None:
+            self.metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_instrumented)
+        finally:
+            query_stats.reset(token)
+            duration = time.perf_counter() - started
+            if self.metrics is not None:
+                self.metrics.in_flight -= 1
+                self.metrics.observe(
+                    scope['method'],
+                    _route(scope),
+                    status,
+                    duration,
+                    size,
+                    stats.statements,
+                    stats.duration,
+                )
+            if self.access_log:
+                access_logger.info(
+                    json.dumps(
+                        {
+                            'method': scope['method'],
+                            'path': scope['path'],
+                            'status': status,
+                            'duration_ms': round(duration * 1000, 2),
+                            'db_statements': stats.statements,
+                            'db_time_ms': round(stats.duration * 1000, 2),
+                            'response_bytes': size,
+                        },
+                        ensure_ascii=False,
+                    )
+                )
+
+
+class ConsistencyMiddleware:
+    # read-your-writes across workers and pods: a write hands the client the WAL position of
+    # its commit, and reads carrying it are served only by replicas that have replayed it
+    def __init__(self, app: ASGIApp, cookie_max_age: float):
+        self.app = app
+        self.cookie_max_age = int(cookie_max_age)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        lsn = headers.get(CONSISTENCY_HEADER)
+        if lsn is None:
+            lsn = cookie_parser(headers.get('cookie', '')).get(CONSISTENCY_COOKIE)
+        state = Consistency(parse_lsn(lsn))
+
+        async def send_with_token(message: Message) -> None:
+            if message['type'] == 'http.response.start' and state.commit_lsn is not None:
+                response_headers = MutableHeaders(scope=message)
+                response_headers.append(CONSISTENCY_HEADER, state.commit_lsn)
+                response_headers.append(
+                    'Set-Cookie',
+                    f'{CONSISTENCY_COOKIE}={state.commit_lsn}; Max-Age={self.cookie_max_age}; '
+                    'Path=/; HttpOnly; SameSite=Lax',
+                )
+            await send(message)
+
+        token = consistency.set(state)
+        try:
+            await self.app(scope, receive, send_with_token)
+        finally:
+            consistency.reset(token)
@@ -0,0 +1,202 @@
+import asyncio
+import cProfile
+import hmac
+import marshal
+import random
+import re
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from uuid import uuid4
+
+from greenlet import getcurrent
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+FORMATS = {'prof': '.prof', 'collapsed': '.txt'}
+AWAIT_FRAME = '[await]'
+
+
+def _label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f'{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})'
+
+
+def _task_frames(task: asyncio.Task) -> list[FrameType]:
+    # outermost first: the request task is suspended, follow what each coroutine awaits
+    frames, awaitable = [], task.get_coro()
+    while awaitable is not None:
+        frame = getattr(awaitable, 'cr_frame', None) or getattr(awaitable, 'ag_frame', None)
+        if frame is None:
+            break
+        frames.append(frame)
+        awaitable = getattr(awaitable, 'cr_await', None) or getattr(awaitable, 'ag_await', None)
+    return frames
+
+
+class StackSampler:
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._root: FrameType | None = None
+        self._task: asyncio.Task | None = None
+        self._previous = None
+
+    def start(self, root: FrameType) -> None:
+        self._root = root
+        self._task = asyncio.current_task()
+        self._previous = signal.signal(signal.SIGALRM, self._sample)
+        signal.setitimer(signal.ITIMER_REAL, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_REAL, 0, 0)
+        signal.signal(signal.SIGALRM, self._previous or signal.SIG_DFL)
+
+    def _running_frames(self, frame: FrameType | None) -> list[FrameType] | None:
+        # statements run inside greenlets whose stacks continue in the parent greenlet
+        frames, current = [], getcurrent()
+        while True:
+            while frame is not None:
+                frames.append(frame)
+                if frame is self._root:
+                    return frames[::-1]
+                frame = frame.f_back
+            current = current.parent
+            if current is None:
+                return None
+            frame = current.gr_frame
+
+    def _sample(self, signum: int, frame: FrameType | None) -> None:
+        frames = self._running_frames(frame)
+        if frames is not None:
+            labels = [_label(frame) for frame in frames]
+        else:
+            # another task is on the CPU, or the loop waits for I/O on this request's behalf
+            frames = _task_frames(self._task)
+            if self._root in frames:
+                frames = frames[frames.index(self._root):]
+            labels = [_label(frame) for frame in frames] + [AWAIT_FRAME]
+        self.samples[';'.join(labels)] += 1
+
+    def collapsed(self) -> bytes:
+        lines = (f'{stack} {count}' for stack, count in self.samples.most_common())
+        return '\n'.join(lines).encode() + b'\n'
+
+
+class ProfilingMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        admin_key: str,
+        directory: str,
+        sample_rate: float = 0.0,
+        sample_format: str = 'collapsed',
+        interval: float = 0.001,
+    ):
+        self.app = app
+        self.admin_key = admin_key
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.sample_format = sample_format
+        self.interval = interval
+        self._busy = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        requested = headers.get('x-profile')
+        if requested is not None:
+            key = headers.get('x-profile-key', '')
+            if not self.admin_key or not hmac.compare_digest(
+                key.encode('latin-1'), self.admin_key.encode()
+            ):
+                response = JSONResponse({'detail': 'Задан неверный ключ профилирования'}, 403)
+                await response(scope, receive, send)
+                return
+            if requested not in FORMATS:
+                response = JSONResponse(
+                    {'detail': f'Формат профиля должен быть одним из: {", ".join(FORMATS)}'}, 400
+                )
+                await response(scope, receive, send)
+                return
+            if self._busy or threading.current_thread() is not threading.main_thread():
+                response = JSONResponse({'detail': 'Профилирование уже выполняется'}, 409)
+                await response(scope, receive, send)
+                return
+            download = headers.get('x-profile-output', 'download') == 'download'
+            await self._profile(scope, receive, send, requested, download)
+        elif (
+            self.sample_rate > 0
+            and random.random() < self.sample_rate
+            and not self._busy
+            and threading.current_thread() is threading.main_thread()
+        ):
+            await self._profile(scope, receive, send, self.sample_format, download=False)
+        else:
+            await self.app(scope, receive, send)
+
+    def _filename(self, scope: Scope, profile_format: str) -> str:
+        path = re.sub(r'[^A-Za-z0-9]+', '-', scope['path']).strip('-') or 'root'
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        return f'{stamp}-{uuid4().hex[:8]}-{scope["method"]}-{path}{FORMATS[profile_format]}'
+
+    async def _profile(
+        self, scope: Scope, receive: Receive, send: Send, profile_format: str, download: bool
+    ) -> None:
+        filename = self._filename(scope, profile_format)
+        status = 500
+
+        async def send_profiled(message: Message) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if not download:
+                    message.setdefault('headers', []).append(
+                        (b'x-profile-file', filename.encode())
+                    )
+            if not download:
+                await send(message)
+
+        self._busy = True
+        if profile_format == 'prof':
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = StackSampler(self.interval)
+            profiler.start(sys._getframe())
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            if profile_format == 'prof':
+                profiler.disable()
+                profiler.create_stats()
+                data = marshal.dumps(profiler.stats)
+            else:
+                profiler.stop()
+                data = profiler.collapsed()
+            self._busy = False
+
+        if download:
+            response = Response(
+                data,
+                media_type='application/octet-stream',
+                headers={
+                    'Content-Disposition': f'attachment; filename="{filename}"',
+                    'X-Profiled-Status': str(status),
+                },
+            )
+            await response(scope, receive, send)
+        else:
+            await asyncio.to_thread(self._store, filename, data)
+
+    def _store(self, filename: str, data: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / filename).write_bytes(data)
@@ -3,23 +3,59 @@ from typing import List
 from dishka.integrations.fastapi import FromDishka, inject
 from fastapi import APIRouter, Depends, HTTPException
 
+from app.adapters.routers.conditional import conditional_route
+from app.adapters.routers.dependencies.dependencies import LOOKUP, SCAN, WRITE, admit, batch_ids
 from app.adapters.schemas.activity import (
+    ActivityBatchSchema,
     ActivityCreateSchema,
     ActivitySchema,
     ActivityUpdateSchema,
 )
+from app.adapters.schemas.batch import BatchSchema
 from app.services.activity import ActivityService
+from app.services.batch import unique_ids
+from app.settings import settings
 
-router = APIRouter(prefix='/activities', tags=['Деятельность'])
+router = APIRouter(
+    prefix='/activities',
+    tags=['Деятельность'],
+    route_class=conditional_route(('activities',), settings.CACHE_CONTROL_ACTIVITIES),
+)
 
 
-@router.get('/', response_model=List[ActivitySchema])
+@router.get('/', response_model=List[ActivitySchema], dependencies=[Depends(admit(SCAN))])
 @inject
 async def get_all(service: FromDishka[ActivityService]) -> List[ActivitySchema]:
     return await service.get_all()
 
 
-@router.get('/{activity_id}', response_model=ActivitySchema)
+@router.get(
+    '/batch',
+    response_model=ActivityBatchSchema,
+    summary='Виды деятельности по списку идентификаторов, в порядке запроса',
+    dependencies=[Depends(admit(LOOKUP))],
+)
+@inject
+async def get_batch(
+    service: FromDishka[ActivityService], ids: list[int] = Depends(batch_ids)
+) -> ActivityBatchSchema:
+    return await service.get_by_ids(unique_ids(ids, settings.BATCH_MAX_IDS))
+
+
+@router.post(
+    '/batch',
+    response_model=ActivityBatchSchema,
+    summary='Виды деятельности по длинному списку идентификаторов, в порядке запроса',
+    dependencies=[Depends(admit(LOOKUP))],
+)
+@inject
+async def post_batch(
+    body: BatchSchema, service: FromDishka[ActivityService]
+) -> ActivityBatchSchema:
+    return await service.get_by_ids(unique_ids(body.ids, settings.BATCH_MAX_IDS))
+
+
+@router.get('/{activity_id}', response_model=ActivitySchema, dependencies=[Depends(admit(LOOKUP))])
 @inject
 async def get_by_id(activity_id: int, service: FromDishka[ActivityService]) -> ActivitySchema:
     activity = await service.get_by_id(activity_id)
@@ -31,7 +67,11 @@ async def get_by_id(activity_id: int, service: FromDishka[ActivityService]) -> A
 @router.post(
     '/',
     response_model=ActivitySchema,
-    summary='Создание Деятельности. Ограничено 3 уровнем вложенности',
+    summary=(
+        'Создание Деятельности. '
+        f'Ограничено {settings.ACTIVITY_MAX_DEPTH} уровнем вложенности'
+    ),
+    dependencies=[Depends(admit(WRITE))],
 )
 @inject
 async def create(
@@ -40,7 +80,7 @@ async def create(
     return await service.create(**activity.model_dump())
 
 
-@router.put('/{activity_id}', response_model=ActivitySchema)
+@router.put('/{activity_id}', response_model=ActivitySchema, dependencies=[Depends(admit(WRITE))])
 @inject
 async def update(
     service: FromDishka[ActivityService],
@@ -53,7 +93,7 @@ async def update(
     return await service.update(activity_obj, **activity.model_dump(exclude_unset=True))
 
 
-@router.delete('/{activity_id}', status_code=204)
+@router.delete('/{activity_id}', status_code=204, dependencies=[Depends(admit(WRITE))])
 @inject
 async def delete(activity_id: int, service: FromDishka[ActivityService]):
     activity = await service.get_by_id(activity_id)
@@ -1,25 +1,61 @@
 from typing import List
 
 from dishka.integrations.fastapi import FromDishka, inject
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
+from app.adapters.routers.conditional import conditional_route
+from app.adapters.routers.dependencies.dependencies import LOOKUP, SCAN, WRITE, admit, batch_ids
+from app.adapters.schemas.batch import BatchSchema
 from app.adapters.schemas.building import (
+    BuildingBatchSchema,
     BuildingCreateSchema,
     BuildingSchema,
     BuildingUpdateSchema,
 )
+from app.services.batch import unique_ids
 from app.services.building import BuildingService
+from app.settings import settings
 
-router = APIRouter(prefix='/buildings', tags=['Здание'])
+router = APIRouter(
+    prefix='/buildings',
+    tags=['Здание'],
+    route_class=conditional_route(('buildings',), settings.CACHE_CONTROL_BUILDINGS),
+)
 
 
-@router.get('/', response_model=List[BuildingSchema])
+@router.get('/', response_model=List[BuildingSchema], dependencies=[Depends(admit(SCAN))])
 @inject
 async def get_all(service: FromDishka[BuildingService]):
     return await service.get_all()
 
 
-@router.get('/{building_id}', response_model=BuildingSchema)
+@router.get(
+    '/batch',
+    response_model=BuildingBatchSchema,
+    summary='Здания по списку идентификаторов, в порядке запроса',
+    dependencies=[Depends(admit(LOOKUP))],
+)
+@inject
+async def get_batch(
+    service: FromDishka[BuildingService], ids: list[int] = Depends(batch_ids)
+) -> BuildingBatchSchema:
+    return await service.get_by_ids(unique_ids(ids, settings.BATCH_MAX_IDS))
+
+
+@router.post(
+    '/batch',
+    response_model=BuildingBatchSchema,
+    summary='Здания по длинному списку идентификаторов, в порядке запроса',
+    dependencies=[Depends(admit(LOOKUP))],
+)
+@inject
+async def post_batch(
+    body: BatchSchema, service: FromDishka[BuildingService]
+) -> BuildingBatchSchema:
+    return await service.get_by_ids(unique_ids(body.ids, settings.BATCH_MAX_IDS))
+
+
+@router.get('/{building_id}', response_model=BuildingSchema, dependencies=[Depends(admit(LOOKUP))])
 @inject
 async def get_by_id(building_id: int, service: FromDishka[BuildingService]):
     building = await service.get_by_id(building_id)
@@ -28,13 +64,13 @@ async def get_by_id(building_id: int, service: FromDishka[BuildingService]):
     return building
 
 
-@router.post('/', response_model=BuildingSchema)
+@router.post('/', response_model=BuildingSchema, dependencies=[Depends(admit(WRITE))])
 @inject
 async def create(building: BuildingCreateSchema, service: FromDishka[BuildingService]):
     return await service.create(**building.model_dump())
 
 
-@router.put('/{building_id}', response_model=BuildingSchema)
+@router.put('/{building_id}', response_model=BuildingSchema, dependencies=[Depends(admit(WRITE))])
 @inject
 async def update(
     building_id: int, building: BuildingUpdateSchema, service: FromDishka[BuildingService]
@@ -45,7 +81,7 @@ async def update(
     return await service.update(building_obj, **building.model_dump(exclude_unset=True))
 
 
-@router.delete('/{building_id}', status_code=204)
+@router.delete('/{building_id}', status_code=204, dependencies=[Depends(admit(WRITE))])
 @inject
 async def delete(building_id: int, service: FromDishka[BuildingService]):
     building = await service.get_by_id(building_id)
@@ -0,0 +1,78 @@
+import hashlib
+from functools import partial
+from typing import Callable
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from app.adapters.routers.dependencies.dependencies import WRITE, valid_api_key
+from app.domain.table_versions import TableVersions
+from app.infrastructure.database import load_table_versions
+from app.infrastructure.replicas import ReadSession
+
+
+def _etag(request: Request, versions: tuple[int, ...]) -> str:
+    key = repr(
+        (
+            request.app.version,
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            versions,
+        )
+    )
+    return f'"{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}"'
+
+
+def _tags(request: Request) -> set[str]:
+    header = request.headers.get('if-none-match')
+    if not header:
+        return set()
+    return {tag.strip().removeprefix('W/') for tag in header.split(',')}
+
+
+def conditional_route(tables: tuple[str, ...], cache_control: str) -> type[APIRoute]:
+    class ConditionalRoute(APIRoute):
+        def get_route_handler(self) -> Callable:
+            handler = super().get_route_handler()
+            # batch lookups are POSTs too; only routes admitted as writes change the tables
+            writes = any(
+                getattr(depends.dependency, 'group', None) == WRITE
+                for depends in self.dependencies
+            )
+
+            async def route_handler(request: Request) -> Response:
+                container = request.state.dishka_container
+                versions: TableVersions = await container.get(TableVersions)
+                if writes:
+                    try:
+                        return await handler(request)
+                    finally:
+                        versions.invalidate()
+                if request.method not in ('GET', 'HEAD'):
+                    request.state.read_only = True
+                    return await handler(request)
+
+                if not valid_api_key(request.headers.get('x-api-key')):
+                    return await handler(request)
+
+                # a lagging replica must not be paired with the primary's newer versions
+                session = await container.get(ReadSession)
+                loader = None
+                if session.info.get('replica'):
+                    loader = partial(load_table_versions, session)
+                etag = _etag(request, await versions.get(tables, loader))
+                headers = {'ETag': etag, 'Cache-Control': cache_control}
+                tags = _tags(request)
+                if etag in tags:
+                    return Response(status_code=304, headers=headers)
+                response = await handler(request)
+                # '*' matches any current representation, so a missing resource is not one
+                if '*' in tags and 200 <= response.status_code < 300:
+                    return Response(status_code=304, headers=headers)
+                if response.status_code == 200:
+                    response.headers.update(headers)
+                return response
+
+            return route_handler
+
+    return ConditionalRoute
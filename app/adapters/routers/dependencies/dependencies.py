@@ -1,10 +1,88 @@
-from fastapi import HTTPException, Security
+import hmac
+from math import ceil
+from typing import AsyncIterator, Callable
+
+from fastapi import HTTPException, Query, Request, Security
 from fastapi.security import APIKeyHeader
 
+from app.domain.admission import Bulkhead, Rejected, TokenBuckets
 from app.settings import settings
 
+SCAN = 'scan'
+LOOKUP = 'lookup'
+WRITE = 'write'
+IMPORT = 'import'
+
+bulkheads = {
+    name: Bulkhead(
+        name, limit, queue, settings.BULKHEAD_QUEUE_TIMEOUT, settings.BULKHEAD_RETRY_AFTER
+    )
+    for name, limit, queue in (
+        (SCAN, settings.BULKHEAD_SCAN_LIMIT, settings.BULKHEAD_SCAN_QUEUE),
+        (LOOKUP, settings.BULKHEAD_LOOKUP_LIMIT, settings.BULKHEAD_LOOKUP_QUEUE),
+        (WRITE, settings.BULKHEAD_WRITE_LIMIT, settings.BULKHEAD_WRITE_QUEUE),
+        (IMPORT, settings.BULKHEAD_IMPORT_LIMIT, settings.BULKHEAD_IMPORT_QUEUE),
+    )
+}
+rate_limits = TokenBuckets(settings.RATE_LIMIT_RATE, settings.RATE_LIMIT_BURST)
+
+
+def _retry_after(rejected: Rejected) -> dict[str, str]:
+    return {'Retry-After': str(max(1, ceil(rejected.retry_after)))}
+
+
+def _caller(request: Request, api_key: str) -> tuple[str, str | None]:
+    # every client shares the single API_KEY, so the bucket is per key and client address;
+    # behind an ingress uvicorn must trust it (FORWARDED_ALLOW_IPS) to see the real address
+    return api_key, request.client.host if request.client else None
+
+
+def valid_api_key(x_api_key: str | None) -> bool:
+    # header values arrive latin-1 decoded; compare bytes in constant time
+    return hmac.compare_digest((x_api_key or '').encode('latin-1'), settings.API_KEY.encode())
 
-def get_api_key(x_api_key: str = Security(APIKeyHeader(name='X-API-Key', auto_error=False))):
-    if x_api_key != settings.API_KEY:
+
+async def get_api_key(
+    request: Request,
+    x_api_key: str = Security(APIKeyHeader(name='X-API-Key', auto_error=False)),
+):
+    if not valid_api_key(x_api_key):
         raise HTTPException(status_code=403, detail='Задан неверный ключ')
+    if settings.RATE_LIMIT_ENABLED:
+        try:
+            rate_limits.take(_caller(request, x_api_key))
+        except Rejected as rejected:
+            raise HTTPException(
+                status_code=429, detail='Превышен лимит запросов', headers=_retry_after(rejected)
+            )
     return x_api_key
+
+
+def admit(group: str) -> Callable[[], AsyncIterator[None]]:
+    bulkhead = bulkheads[group]
+
+    # the slot is held until the response, including a streamed one, has been sent
+    async def dependency() -> AsyncIterator[None]:
+        if not settings.BULKHEAD_ENABLED:
+            yield
+            return
+        try:
+            await bulkhead.acquire()
+        except Rejected as rejected:
+            raise HTTPException(
+                status_code=503, detail='Сервер перегружен', headers=_retry_after(rejected)
+            )
+        try:
+            yield
+        finally:
+            bulkhead.release()
+
+    dependency.group = group
+    return dependency
+
+
+def batch_ids(ids: str = Query(description='id через запятую')) -> list[int]:
+    try:
+        return [int(entity_id) for entity_id in ids.split(',') if entity_id.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail='ids должен быть списком целых чисел')
@@ -0,0 +1,96 @@
+from dishka.integrations.fastapi import FromDishka, inject
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from app.adapters.importing import ImportFormat, RecordValidator, decode_lines, read_records
+from app.adapters.routers.dependencies.dependencies import IMPORT, admit
+from app.adapters.schemas.imports import (
+    ActivityImportSchema,
+    BuildingImportSchema,
+    ImportReportSchema,
+    OrganizationImportSchema,
+)
+from app.services.bulk_import import BulkImportService, ImportResult
+from app.settings import settings
+
+router = APIRouter(
+    prefix='/import', tags=['Импорт'], dependencies=[Depends(admit(IMPORT))]
+)
+
+
+async def _chunks(request: Request):
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > settings.IMPORT_MAX_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f'Размер файла превышает {settings.IMPORT_MAX_BYTES} байт',
+            )
+        yield chunk
+
+
+async def _records(request: Request, import_format: ImportFormat):
+    # the body is parsed as it arrives and handed to the import in batches
+    try:
+        async for record in read_records(decode_lines(_chunks(request)), import_format):
+            yield record
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail='Файл должен быть в кодировке UTF-8')
+
+
+def _report(validator: RecordValidator, result: ImportResult) -> ImportReportSchema:
+    errors = sorted(validator.errors + result.errors)
+    return ImportReportSchema(
+        total=validator.total,
+        imported=result.imported,
+        updated=result.updated,
+        errors=[{'row': row, 'error': error} for row, error in errors],
+    )
+
+
+@router.post(
+    '/buildings',
+    response_model=ImportReportSchema,
+    summary='Массовая загрузка зданий из NDJSON или CSV',
+)
+@inject
+async def import_buildings(
+    request: Request,
+    service: FromDishka[BulkImportService],
+    import_format: ImportFormat = Query(ImportFormat.ndjson, alias='format'),
+) -> ImportReportSchema:
+    validator = RecordValidator(BuildingImportSchema)
+    result = await service.import_buildings(validator(_records(request, import_format)))
+    return _report(validator, result)
+
+
+@router.post(
+    '/activities',
+    response_model=ImportReportSchema,
+    summary='Массовая загрузка видов деятельности из NDJSON или CSV',
+)
+@inject
+async def import_activities(
+    request: Request,
+    service: FromDishka[BulkImportService],
+    import_format: ImportFormat = Query(ImportFormat.ndjson, alias='format'),
+) -> ImportReportSchema:
+    validator = RecordValidator(ActivityImportSchema)
+    result = await service.import_activities(validator(_records(request, import_format)))
+    return _report(validator, result)
+
+
+@router.post(
+    '/organizations',
+    response_model=ImportReportSchema,
+    summary='Массовая загрузка организаций из NDJSON или CSV',
+)
+@inject
+async def import_organizations(
+    request: Request,
+    service: FromDishka[BulkImportService],
+    import_format: ImportFormat = Query(ImportFormat.ndjson, alias='format'),
+) -> ImportReportSchema:
+    validator = RecordValidator(OrganizationImportSchema)
+    result = await service.import_organizations(validator(_records(request, import_format)))
+    return _report(validator, result)
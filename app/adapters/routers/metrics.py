@@ -0,0 +1,32 @@
+from dishka.integrations.fastapi import FromDishka, inject
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.adapters.metrics import http_metrics, render
+from app.adapters.routers.dependencies.dependencies import bulkheads, rate_limits
+from app.domain.entity_cache import EntityCache
+from app.infrastructure.replicas import ReplicaSet
+from app.settings import settings
+
+router = APIRouter()
+
+
+@router.get('/metrics', include_in_schema=False)
+@inject
+async def metrics(
+    engine: FromDishka[AsyncEngine],
+    replicas: FromDishka[ReplicaSet],
+    cache: FromDishka[EntityCache],
+) -> PlainTextResponse:
+    return PlainTextResponse(
+        render(
+            http_metrics,
+            engine.pool.stats(),
+            replicas.stats(),
+            cache.stats() if settings.ENTITY_CACHE_ENABLED else None,
+            [bulkhead.stats() for bulkhead in bulkheads.values()],
+            rate_limits.rejected,
+        ),
+        media_type='text/plain; version=0.0.4',
+    )
@@ -1,28 +1,66 @@
-from typing import List
+import zlib
+from typing import AsyncIterator, List
 
 from dishka.integrations.fastapi import FromDishka, inject
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 
+from app.adapters.routers.conditional import conditional_route
+from app.adapters.routers.dependencies.dependencies import LOOKUP, SCAN, WRITE, admit, batch_ids
+from app.adapters.schemas.batch import BatchSchema
 from app.adapters.schemas.organization import (
+    NearestSearchSchema,
+    OrganizationBatchSchema,
     OrganizationCreateSchema,
+    OrganizationDistancePageSchema,
+    OrganizationDistanceSchema,
     OrganizationFullSchema,
+    OrganizationPageSchema,
     OrganizationSchema,
+    OrganizationSuggestSchema,
     OrganizationUpdateSchema,
+    PaginationSchema,
     RadiusSearchSchema,
     RectangleSearchSchema,
+    SearchByNameSchema,
+    SuggestSchema,
 )
+from app.adapters.serialization import JSONProjection
+from app.services.batch import unique_ids
 from app.services.organiztion import OrganizationService
+from app.settings import settings
+
+router = APIRouter(
+    prefix='/organizations',
+    tags=['Организация'],
+    route_class=conditional_route(
+        ('organizations', 'buildings', 'activities'), settings.CACHE_CONTROL_ORGANIZATIONS
+    ),
+)
+
+_full = JSONProjection(OrganizationFullSchema)
+_batch = JSONProjection(OrganizationBatchSchema)
+_page = JSONProjection(OrganizationPageSchema)
+_distance_page = JSONProjection(OrganizationDistancePageSchema)
+_nearest = JSONProjection(List[OrganizationDistanceSchema])
+_suggest = JSONProjection(List[OrganizationSuggestSchema])
 
-router = APIRouter(prefix='/organizations', tags=['Организация'])
 
+def _respond(projection: JSONProjection, content):
+    if settings.FAST_SERIALIZATION:
+        return projection.response(content)
+    return content
 
-@router.get('/', response_model=List[OrganizationFullSchema])
+
+@router.get('/', response_model=OrganizationPageSchema, dependencies=[Depends(admit(SCAN))])
 @inject
-async def get_all(service: FromDishka[OrganizationService]) -> List[OrganizationFullSchema]:
-    return await service.get_all()
+async def get_all(
+    service: FromDishka[OrganizationService], page: PaginationSchema = Depends()
+) -> OrganizationPageSchema:
+    return _respond(_page, await service.get_all(page.limit, page.cursor))
 
 
-@router.post('/', response_model=OrganizationSchema)
+@router.post('/', response_model=OrganizationSchema, dependencies=[Depends(admit(WRITE))])
 @inject
 async def create(
     organization: OrganizationCreateSchema, service: FromDishka[OrganizationService]
@@ -31,81 +69,195 @@ async def create(
 
 
 @router.get(
-    '/search', response_model=List[OrganizationFullSchema], summary='Поиск организации по названию'
+    '/search',
+    response_model=OrganizationPageSchema,
+    summary='Поиск организации по названию, упорядоченный по степени сходства',
+    dependencies=[Depends(admit(SCAN))],
 )
 @inject
 async def search_by_name(
-    service: FromDishka[OrganizationService], name: str
-) -> List[OrganizationFullSchema]:
-    return await service.search_by_name(name)
+    service: FromDishka[OrganizationService],
+    params: SearchByNameSchema = Depends(),
+    page: PaginationSchema = Depends(),
+) -> OrganizationPageSchema:
+    result = await service.search_by_name(
+        params.name, page.limit, page.cursor, params.min_similarity
+    )
+    return _respond(_page, result)
+
+
+@router.get(
+    '/suggest',
+    response_model=List[OrganizationSuggestSchema],
+    summary='Автодополнение названия организации по префиксу',
+    dependencies=[Depends(admit(LOOKUP))],
+)
+@inject
+async def suggest(
+    service: FromDishka[OrganizationService], params: SuggestSchema = Depends()
+) -> List[OrganizationSuggestSchema]:
+    return _respond(_suggest, await service.suggest(params.prefix, params.limit))
+
+
+async def _ndjson(
+    batches: AsyncIterator[List[dict]], compress: bool
+) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    async for batch in batches:
+        chunk = b''.join(
+            OrganizationFullSchema.model_validate(org).model_dump_json().encode() + b'\n'
+            for org in batch
+        )
+        yield compressor.compress(chunk) if compressor else chunk
+    if compressor:
+        yield compressor.flush()
+
+
+@router.get(
+    '/export',
+    response_class=StreamingResponse,
+    summary='Потоковая выгрузка всех организаций в формате NDJSON',
+    dependencies=[Depends(admit(SCAN))],
+)
+@inject
+async def export(service: FromDishka[OrganizationService], gzip: bool = False):
+    headers = {'Content-Disposition': 'attachment; filename="organizations.ndjson"'}
+    if gzip:
+        headers['Content-Encoding'] = 'gzip'
+    return StreamingResponse(
+        _ndjson(service.export(settings.EXPORT_BATCH_SIZE), gzip),
+        media_type='application/x-ndjson',
+        headers=headers,
+    )
 
 
 @router.get(
     '/by_building/{building_id}',
-    response_model=List[OrganizationFullSchema],
+    response_model=OrganizationPageSchema,
     summary='Список всех организаций находящихся в конкретном здании',
+    dependencies=[Depends(admit(SCAN))],
 )
 @inject
 async def get_by_building(
-    building_id: int, service: FromDishka[OrganizationService]
-) -> List[OrganizationFullSchema]:
-    return await service.get_by_building(building_id)
+    building_id: int,
+    service: FromDishka[OrganizationService],
+    page: PaginationSchema = Depends(),
+) -> OrganizationPageSchema:
+    return _respond(_page, await service.get_by_building(building_id, page.limit, page.cursor))
 
 
 @router.get(
     '/by_activity/{activity_id}',
-    response_model=List[OrganizationFullSchema],
+    response_model=OrganizationPageSchema,
     summary='Поиск по деятельности (с учетом поддеятельностей)',
+    dependencies=[Depends(admit(SCAN))],
 )
 @inject
 async def get_by_activity(
-    activity_id: int, service: FromDishka[OrganizationService]
-) -> List[OrganizationFullSchema]:
-    return await service.get_by_activity(activity_id)
+    activity_id: int,
+    service: FromDishka[OrganizationService],
+    page: PaginationSchema = Depends(),
+) -> OrganizationPageSchema:
+    return _respond(_page, await service.get_by_activity(activity_id, page.limit, page.cursor))
 
 
 @router.get(
     '/by_radius',
-    response_model=List[OrganizationFullSchema],
-    summary='Список организаций, которые находятся в заданном радиусе',
+    response_model=OrganizationDistancePageSchema,
+    summary='Список организаций в заданном радиусе, отсортированный по удаленности',
+    dependencies=[Depends(admit(SCAN))],
 )
 @inject
 async def get_in_radius(
-    service: FromDishka[OrganizationService], params: RadiusSearchSchema = Depends()
-) -> List[OrganizationFullSchema]:
-    return await service.get_in_radius(params.lat, params.lon, params.radius_km)
+    service: FromDishka[OrganizationService],
+    params: RadiusSearchSchema = Depends(),
+    page: PaginationSchema = Depends(),
+) -> OrganizationDistancePageSchema:
+    result = await service.get_in_radius(
+        params.lat, params.lon, params.radius_km, page.limit, page.cursor
+    )
+    return _respond(_distance_page, result)
+
+
+@router.get(
+    '/nearest',
+    response_model=List[OrganizationDistanceSchema],
+    summary='Ближайшие к точке организации, с опциональным фильтром по деятельности',
+    dependencies=[Depends(admit(LOOKUP))],
+)
+@inject
+async def get_nearest(
+    service: FromDishka[OrganizationService], params: NearestSearchSchema = Depends()
+) -> List[OrganizationDistanceSchema]:
+    result = await service.get_nearest(
+        params.lat, params.lon, params.k, params.activity_id, params.max_distance_km
+    )
+    return _respond(_nearest, result)
 
 
 @router.get(
     '/by_rectangle',
-    response_model=List[OrganizationFullSchema],
+    response_model=OrganizationPageSchema,
     summary='Список организаций, которые находятся в заданной прямоугольной области',
+    dependencies=[Depends(admit(SCAN))],
 )
 @inject
 async def get_in_rect(
-    service: FromDishka[OrganizationService], params: RectangleSearchSchema = Depends()
-) -> List[OrganizationFullSchema]:
-    return await service.get_in_rect(
-        params.min_lat, params.max_lat, params.min_lon, params.max_lon
+    service: FromDishka[OrganizationService],
+    params: RectangleSearchSchema = Depends(),
+    page: PaginationSchema = Depends(),
+) -> OrganizationPageSchema:
+    result = await service.get_in_rect(
+        params.min_lat, params.max_lat, params.min_lon, params.max_lon, page.limit, page.cursor
     )
+    return _respond(_page, result)
+
+
+@router.get(
+    '/batch',
+    response_model=OrganizationBatchSchema,
+    summary='Организации по списку идентификаторов, в порядке запроса',
+    dependencies=[Depends(admit(LOOKUP))],
+)
+@inject
+async def get_batch(
+    service: FromDishka[OrganizationService], ids: list[int] = Depends(batch_ids)
+) -> OrganizationBatchSchema:
+    batch = await service.get_documents(unique_ids(ids, settings.BATCH_MAX_IDS))
+    return _respond(_batch, batch)
+
+
+@router.post(
+    '/batch',
+    response_model=OrganizationBatchSchema,
+    summary='Организации по длинному списку идентификаторов, в порядке запроса',
+    dependencies=[Depends(admit(LOOKUP))],
+)
+@inject
+async def post_batch(
+    body: BatchSchema, service: FromDishka[OrganizationService]
+) -> OrganizationBatchSchema:
+    batch = await service.get_documents(unique_ids(body.ids, settings.BATCH_MAX_IDS))
+    return _respond(_batch, batch)
 
 
 @router.get(
     '/{org_id}',
     response_model=OrganizationFullSchema,
     summary='Вывод информации об организации по её идентификатору',
+    dependencies=[Depends(admit(LOOKUP))],
 )
 @inject
 async def get_by_id(
     org_id: int, service: FromDishka[OrganizationService]
 ) -> OrganizationFullSchema:
-    org = await service.get_by_id(org_id)
+    org = await service.get_document(org_id)
     if not org:
         raise HTTPException(status_code=404, detail=f'Организация с id {org_id} не найдена')
-    return org
+    return _respond(_full, org)
 
 
-@router.put('/{org_id}', response_model=OrganizationSchema)
+@router.put('/{org_id}', response_model=OrganizationSchema, dependencies=[Depends(admit(WRITE))])
 @inject
 async def update(
     org_id: int, organization: OrganizationUpdateSchema, service: FromDishka[OrganizationService]
@@ -116,7 +268,7 @@ async def update(
     return await service.update(org, **organization.model_dump(exclude_unset=True))
 
 
-@router.delete('/{org_id}', status_code=204)
+@router.delete('/{org_id}', status_code=204, dependencies=[Depends(admit(WRITE))])
 @inject
 async def delete(org_id: int, service: FromDishka[OrganizationService]):
     org = await service.get_by_id(org_id)
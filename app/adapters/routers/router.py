@@ -1,9 +1,11 @@
 from fastapi import APIRouter
 
-from app.adapters.routers import activities, buildings, organizations
+from app.adapters.routers import activities, buildings, imports, organizations, system
 
 router = APIRouter(prefix='/secunda')
 
 router.include_router(organizations.router)
 router.include_router(buildings.router)
 router.include_router(activities.router)
+router.include_router(imports.router)
+router.include_router(system.router)
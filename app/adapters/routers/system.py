@@ -0,0 +1,35 @@
+from typing import List
+
+from dishka.integrations.fastapi import FromDishka, inject
+from fastapi import APIRouter
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.adapters.schemas.system import CacheStatsSchema, PoolStatsSchema, ReplicaStatsSchema
+from app.domain.entity_cache import EntityCache
+from app.infrastructure.replicas import ReplicaSet
+
+router = APIRouter(prefix='/system', tags=['Система'])
+
+
+@router.get('/cache', response_model=CacheStatsSchema, summary='Статистика кэша сущностей')
+@inject
+async def cache_stats(cache: FromDishka[EntityCache]) -> CacheStatsSchema:
+    return cache.stats()
+
+
+@router.get(
+    '/pool', response_model=PoolStatsSchema, summary='Состояние пула соединений с базой данных'
+)
+@inject
+async def pool_stats(engine: FromDishka[AsyncEngine]) -> PoolStatsSchema:
+    return engine.pool.stats()
+
+
+@router.get(
+    '/replicas',
+    response_model=List[ReplicaStatsSchema],
+    summary='Отставание и доступность реплик для чтения',
+)
+@inject
+async def replica_stats(replicas: FromDishka[ReplicaSet]) -> List[ReplicaStatsSchema]:
+    return replicas.stats()
@@ -27,3 +27,9 @@ class ActivityUpdateSchema(BaseModel):
 class ActivitySchema(ActivityBaseSchema):
     id: int
     model_config = {'from_attributes': True}
+
+
+class ActivityBatchSchema(BaseModel):
+    items: list[ActivitySchema]
+    missing: list[int]
+    model_config = {'from_attributes': True}
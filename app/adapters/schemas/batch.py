@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+
+
+class BatchSchema(BaseModel):
+    ids: list[int] = Field(min_length=1)
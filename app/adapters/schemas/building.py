@@ -27,3 +27,9 @@ class BuildingUpdateSchema(BaseModel):
 class BuildingSchema(BuildingBaseSchema):
     id: int
     model_config = {'from_attributes': True}
+
+
+class BuildingBatchSchema(BaseModel):
+    items: list[BuildingSchema]
+    missing: list[int]
+    model_config = {'from_attributes': True}
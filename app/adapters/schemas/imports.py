@@ -0,0 +1,66 @@
+from pydantic import BaseModel, field_validator, model_validator
+
+from app.adapters.schemas.activity import ActivityBaseSchema
+from app.adapters.schemas.building import BuildingBaseSchema
+from app.adapters.schemas.organization import OrganizationBaseSchema
+
+
+class ImportRowSchema(BaseModel):
+    @model_validator(mode='before')
+    @classmethod
+    def drop_empty(cls, data):
+        if isinstance(data, dict):
+            return {key: value for key, value in data.items() if value not in ('', None)}
+        return data
+
+
+class BuildingImportSchema(ImportRowSchema, BuildingBaseSchema):
+    pass
+
+
+class ActivityImportSchema(ImportRowSchema, ActivityBaseSchema):
+    parent_name: str | None = None
+
+    @model_validator(mode='after')
+    def validate_parent(self):
+        if self.parent_id is not None and self.parent_name is not None:
+            raise ValueError('Укажите либо parent_id, либо parent_name')
+        return self
+
+
+class OrganizationImportSchema(ImportRowSchema, OrganizationBaseSchema):
+    phones: list[str] = []
+    building_id: int | None = None
+    building_address: str | None = None
+    activity_ids: list[int] = []
+    activity_names: list[str] = []
+
+    @field_validator('phones', 'activity_ids', 'activity_names', mode='before')
+    @classmethod
+    def split_list(cls, v):
+        if isinstance(v, str):
+            return [item.strip() for item in v.split(';') if item.strip()]
+        return v
+
+    @model_validator(mode='after')
+    def validate_references(self):
+        if (self.building_id is None) == (self.building_address is None):
+            raise ValueError('Укажите либо building_id, либо building_address')
+        activities = self.activity_ids + self.activity_names
+        if not activities:
+            raise ValueError('Необходимо указать хотя бы один вид деятельности')
+        if len(activities) != len(set(activities)):
+            raise ValueError('Обнаружены дубликаты видов деятельности')
+        return self
+
+
+class ImportErrorSchema(BaseModel):
+    row: int
+    error: str
+
+
+class ImportReportSchema(BaseModel):
+    total: int
+    imported: int
+    updated: int = 0
+    errors: list[ImportErrorSchema]
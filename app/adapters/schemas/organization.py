@@ -76,8 +76,47 @@ class OrganizationFullSchema(OrganizationSchema):
     activities: list[ActivitySchema]
 
 
+class OrganizationBatchSchema(BaseModel):
+    items: list[OrganizationFullSchema]
+    missing: list[int]
+    model_config = {'from_attributes': True}
+
+
+class OrganizationDistanceSchema(OrganizationFullSchema):
+    distance_km: float
+
+
+class OrganizationPageSchema(BaseModel):
+    items: list[OrganizationFullSchema]
+    next_cursor: str | None
+    model_config = {'from_attributes': True}
+
+
+class OrganizationDistancePageSchema(BaseModel):
+    items: list[OrganizationDistanceSchema]
+    next_cursor: str | None
+    model_config = {'from_attributes': True}
+
+
+class PaginationSchema(BaseModel):
+    limit: int = Field(default=100, ge=1, le=1000)
+    cursor: str | None = None
+
+
+class OrganizationSuggestSchema(BaseModel):
+    id: int
+    name: str
+    model_config = {'from_attributes': True}
+
+
 class SearchByNameSchema(BaseModel):
     name: str = Field(min_length=1)
+    min_similarity: float | None = Field(default=None, ge=0, le=1)
+
+
+class SuggestSchema(BaseModel):
+    prefix: str = Field(min_length=1)
+    limit: int = Field(default=10, ge=1, le=50)
 
 
 class RadiusSearchSchema(BaseModel):
@@ -86,6 +125,14 @@ class RadiusSearchSchema(BaseModel):
     radius_km: float = Field(gt=0)
 
 
+class NearestSearchSchema(BaseModel):
+    lat: float = Field(ge=-90, le=90)
+    lon: float = Field(ge=-180, le=180)
+    k: int = Field(default=10, ge=1, le=100)
+    activity_id: int | None = Field(default=None, ge=1)
+    max_distance_km: float | None = Field(default=None, gt=0)
+
+
 class RectangleSearchSchema(BaseModel):
     min_lat: float = Field(ge=-90, le=90)
     max_lat: float = Field(ge=-90, le=90)
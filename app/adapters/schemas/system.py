@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+
+
+class CacheStatsSchema(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    invalidations: int
+
+
+class PoolStatsSchema(BaseModel):
+    size: int
+    max_overflow: int
+    timeout: float
+    in_use: int
+    idle: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+    wait_buckets: dict[str, int]
+
+
+class ReplicaStatsSchema(BaseModel):
+    url: str
+    lag: float | None
+    healthy: bool
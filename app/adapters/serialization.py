@@ -0,0 +1,73 @@
+import json
+import types
+from operator import getitem
+from typing import Any, Callable, Union, get_args, get_origin
+
+from fastapi import Response
+from pydantic import BaseModel
+
+Projector = Callable[[Any], Any]
+
+
+def _optional(project: Projector) -> Projector:
+    return lambda value: None if value is None else project(value)
+
+
+def _many(project: Projector) -> Projector:
+    return lambda values: [project(value) for value in values]
+
+
+def _model(fields: list[tuple[str, Projector | None]]) -> Projector:
+    def project(value):
+        get = getitem if isinstance(value, dict) else getattr
+        return {
+            name: get(value, name) if field is None else field(get(value, name))
+            for name, field in fields
+        }
+
+    return project
+
+
+def _compile(annotation: Any) -> Projector | None:
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            raise TypeError(f'Неподдерживаемый тип поля: {annotation!r}')
+        project = _compile(args[0])
+        return project and _optional(project)
+    if origin is list:
+        project = _compile(get_args(annotation)[0])
+        return _many(project) if project else list
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _model(
+            [(name, _compile(field.annotation)) for name, field in annotation.model_fields.items()]
+        )
+    if annotation is float:
+        return float
+    if annotation in (str, int, bool):
+        return None
+    raise TypeError(f'Неподдерживаемый тип поля: {annotation!r}')
+
+
+class JSONProjection:
+    def __init__(self, schema: Any):
+        self.schema = schema
+        self._project = _compile(schema) or (lambda value: value)
+
+    def project(self, content: Any) -> Any:
+        return self._project(content)
+
+    def encode(self, content: Any) -> bytes:
+        return json.dumps(
+            self._project(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            indent=None,
+            separators=(',', ':'),
+        ).encode('utf-8')
+
+    def response(self, content: Any, status_code: int = 200) -> Response:
+        return Response(
+            self.encode(content), status_code=status_code, media_type='application/json'
+        )
@@ -1,11 +1,24 @@
 from abc import ABC, abstractmethod
-from typing import Generic, List, TypeVar
+from typing import AsyncIterable, AsyncIterator, Generic, List, TypeVar
 
 from app.domain.entities import Activity, Building, Organization
 
 T = TypeVar('T')
 
 
+class EntityNotFound(Exception):
+    # the row disappeared between reading it and writing it, e.g. a concurrent delete
+    def __init__(self, entity_id: int):
+        super().__init__(f'Запись с id {entity_id} не найдена')
+        self.entity_id = entity_id
+
+
+class AbstractUnitOfWork(ABC):
+    @abstractmethod
+    async def commit(self) -> None:
+        pass
+
+
 class AbstractRepository(ABC, Generic[T]):
     @abstractmethod
     async def get_all(self) -> List[T]:
@@ -15,6 +28,10 @@ class AbstractRepository(ABC, Generic[T]):
     async def get_by_id(self, entity_id: int) -> T | None:
         pass
 
+    @abstractmethod
+    async def get_by_ids(self, entity_ids: list[int]) -> List[T]:
+        pass
+
     @abstractmethod
     async def create(self, **kwargs) -> T:
         pass
@@ -29,7 +46,9 @@ class AbstractRepository(ABC, Generic[T]):
 
 
 class AbstractBuildingRepository(AbstractRepository[Building]):
-    pass
+    @abstractmethod
+    async def get_coordinates(self) -> List[tuple[int, float, float]]:
+        pass
 
 
 class AbstractActivityRepository(AbstractRepository[Activity]):
@@ -37,6 +56,10 @@ class AbstractActivityRepository(AbstractRepository[Activity]):
     async def get_by_name(self, name: str) -> Activity | None:
         pass
 
+    @abstractmethod
+    async def get_hierarchy(self) -> List[tuple[int, int | None]]:
+        pass
+
     @abstractmethod
     async def get_sub_activities(self, activity_id: int, depth: int = 3) -> List[Activity]:
         pass
@@ -48,23 +71,120 @@ class AbstractActivityRepository(AbstractRepository[Activity]):
 
 class AbstractOrganizationRepository(AbstractRepository[Organization]):
     @abstractmethod
-    async def get_by_building(self, building_id: int) -> List[Organization]:
+    async def get_all(
+        self, limit: int | None = None, after_id: int | None = None
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def get_document(self, org_id: int) -> dict | None:
+        pass
+
+    @abstractmethod
+    async def get_documents(self, org_ids: list[int]) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def get_by_building(
+        self, building_id: int, limit: int | None = None, after_id: int | None = None
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def get_by_buildings(
+        self, building_ids: list[int], limit: int | None = None, after_id: int | None = None
+    ) -> List[dict]:
         pass
 
     @abstractmethod
-    async def get_by_activity(self, activity_ids: list[int]) -> List[Organization]:
+    async def get_by_building_distances(
+        self,
+        distances: dict[int, float],
+        limit: int | None = None,
+        after: tuple[float, int] | None = None,
+    ) -> List[dict]:
         pass
 
     @abstractmethod
-    async def get_in_radius(self, lat: float, lon: float, radius_km: float) -> List[Organization]:
+    async def get_by_activity(
+        self, activity_id: int, limit: int | None = None, after_id: int | None = None
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def get_in_radius(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        limit: int | None = None,
+        after: tuple[float, int] | None = None,
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def get_nearest(
+        self,
+        lat: float,
+        lon: float,
+        limit: int,
+        activity_id: int | None = None,
+        max_distance_km: float | None = None,
+    ) -> List[dict]:
         pass
 
     @abstractmethod
     async def get_in_rect(
-        self, min_lat: float, max_lat: float, min_lon: float, max_lon: float
-    ) -> List[Organization]:
+        self,
+        min_lat: float,
+        max_lat: float,
+        min_lon: float,
+        max_lon: float,
+        limit: int | None = None,
+        after_id: int | None = None,
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def search_by_name(
+        self,
+        name: str,
+        limit: int | None = None,
+        after: tuple[float, int] | None = None,
+        min_similarity: float | None = None,
+    ) -> List[dict]:
+        pass
+
+    @abstractmethod
+    async def suggest_by_prefix(self, prefix: str, limit: int) -> List[tuple[int, str]]:
+        pass
+
+    @abstractmethod
+    def stream_all(self, batch_size: int) -> AsyncIterator[List[dict]]:
+        pass
+
+    @abstractmethod
+    async def load_references(
+        self, building_id: int | None, activity_ids: list[int]
+    ) -> tuple[Building | None, List[Activity], List[int]]:
+        pass
+
+
+class AbstractImportRepository(ABC):
+    @abstractmethod
+    async def import_buildings(
+        self, rows: AsyncIterable[tuple[int, dict]], batch_size: int
+    ) -> tuple[int, int, List[tuple[int, str]]]:
+        pass
+
+    @abstractmethod
+    async def import_activities(
+        self, rows: AsyncIterable[tuple[int, dict]], max_depth: int, batch_size: int
+    ) -> tuple[int, List[tuple[int, str]]]:
         pass
 
     @abstractmethod
-    async def search_by_name(self, name: str) -> List[Organization]:
+    async def import_organizations(
+        self, rows: AsyncIterable[tuple[int, dict]], batch_size: int
+    ) -> tuple[int, List[tuple[int, str]]]:
         pass
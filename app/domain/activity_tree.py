@@ -0,0 +1,119 @@
+import asyncio
+from typing import Iterable
+
+from app.domain.abc_repositories import AbstractActivityRepository
+
+
+class ActivityTree:
+    def __init__(self):
+        self.version = 0
+        self.loaded = False
+        self._lock = asyncio.Lock()
+        self._parents: dict[int, int | None] = {}
+        self._children: dict[int | None, set[int]] = {}
+        self._depths: dict[int, int] = {}
+        self._descendants: dict[int, frozenset[int]] = {}
+
+    def __contains__(self, activity_id: int) -> bool:
+        return activity_id in self._depths
+
+    async def ensure_loaded(self, repo: AbstractActivityRepository) -> None:
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                self.rebuild(await repo.get_hierarchy())
+
+    async def refresh(self, repo: AbstractActivityRepository) -> None:
+        async with self._lock:
+            self.rebuild(await repo.get_hierarchy())
+
+    def invalidate(self) -> None:
+        self.loaded = False
+        self.version += 1
+
+    def rebuild(self, edges: Iterable[tuple[int, int | None]]) -> None:
+        self._parents = dict(edges)
+        self._reindex()
+        self.loaded = True
+
+    def upsert(self, activity_id: int, parent_id: int | None) -> None:
+        if not self.loaded:
+            return
+        if activity_id in self._parents:
+            self._parents[activity_id] = parent_id
+            self._reindex()
+            return
+
+        if parent_id not in self:
+            parent_id = None
+        self._parents[activity_id] = parent_id
+        self._children.setdefault(parent_id, set()).add(activity_id)
+        self._depths[activity_id] = self.depth(parent_id) + 1 if parent_id is not None else 0
+        self._descendants[activity_id] = frozenset((activity_id,))
+        for ancestor_id in self.ancestors(activity_id):
+            self._descendants[ancestor_id] = self._descendants[ancestor_id] | {activity_id}
+        self.version += 1
+
+    def remove(self, activity_id: int) -> None:
+        if not self.loaded or activity_id not in self._parents:
+            return
+        self._parents.pop(activity_id)
+        self._reindex()
+
+    def depth(self, activity_id: int | None) -> int:
+        if activity_id is None:
+            return 0
+        return self._depths.get(activity_id, 0)
+
+    def ancestors(self, activity_id: int) -> list[int]:
+        result = []
+        parent_id = self._parents.get(activity_id)
+        while parent_id is not None and parent_id in self and parent_id not in result:
+            result.append(parent_id)
+            parent_id = self._parents.get(parent_id)
+        return result
+
+    def descendants(self, activity_id: int, depth: int | None = None) -> frozenset[int]:
+        subtree = self._descendants.get(activity_id, frozenset())
+        if depth is None:
+            return subtree
+        max_depth = self._depths.get(activity_id, 0) + depth
+        return frozenset(i for i in subtree if self._depths[i] <= max_depth)
+
+    def height(self, activity_id: int) -> int:
+        # levels below the activity within its own subtree, 0 for a leaf
+        depth = self.depth(activity_id)
+        return max((self._depths[i] - depth for i in self.descendants(activity_id)), default=0)
+
+    def _reindex(self) -> None:
+        children: dict[int | None, set[int]] = {}
+        for activity_id, parent_id in self._parents.items():
+            if parent_id not in self._parents:
+                parent_id = None
+            children.setdefault(parent_id, set()).add(activity_id)
+
+        depths: dict[int, int] = {}
+        order: list[int] = []
+        level = sorted(children.get(None, ()))
+        current_depth = 0
+        while level:
+            next_level = []
+            for activity_id in level:
+                depths[activity_id] = current_depth
+                order.append(activity_id)
+                next_level.extend(children.get(activity_id, ()))
+            level = next_level
+            current_depth += 1
+
+        descendants: dict[int, frozenset[int]] = {}
+        for activity_id in reversed(order):
+            subtree = {activity_id}
+            for child_id in children.get(activity_id, ()):
+                subtree |= descendants[child_id]
+            descendants[activity_id] = frozenset(subtree)
+
+        self._children = children
+        self._depths = depths
+        self._descendants = descendants
+        self.version += 1
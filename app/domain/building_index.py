@@ -0,0 +1,108 @@
+import asyncio
+from typing import Iterable
+
+import numpy as np
+
+from app.domain.abc_repositories import AbstractBuildingRepository
+
+# Same sphere radius as earthdistance's earth(), so both radius search paths agree.
+EARTH_RADIUS_KM = 6378.168
+
+
+class BuildingIndex:
+    def __init__(self):
+        self.version = 0
+        self.loaded = False
+        self._lock = asyncio.Lock()
+        self._points: dict[int, tuple[float, float]] = {}
+        self._dirty = True
+        self._ids = np.empty(0, dtype=np.int64)
+        self._lats = np.empty(0, dtype=np.float64)
+        self._lons = np.empty(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    async def ensure_loaded(self, repo: AbstractBuildingRepository) -> None:
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                self.rebuild(await repo.get_coordinates())
+
+    async def refresh(self, repo: AbstractBuildingRepository) -> None:
+        async with self._lock:
+            self.rebuild(await repo.get_coordinates())
+
+    def invalidate(self) -> None:
+        self.loaded = False
+        self.version += 1
+
+    def rebuild(self, points: Iterable[tuple[int, float, float]]) -> None:
+        self._points = {
+            building_id: (lat, lon)
+            for building_id, lat, lon in points
+            if lat is not None and lon is not None
+        }
+        self._dirty = True
+        self.loaded = True
+        self.version += 1
+
+    def upsert(self, building_id: int, lat: float | None, lon: float | None) -> None:
+        if not self.loaded:
+            return
+        if lat is None or lon is None:
+            self.remove(building_id)
+            return
+        self._points[building_id] = (lat, lon)
+        self._dirty = True
+        self.version += 1
+
+    def remove(self, building_id: int) -> None:
+        if not self.loaded or self._points.pop(building_id, None) is None:
+            return
+        self._dirty = True
+        self.version += 1
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> list[tuple[int, float]]:
+        ids, lats, lons = self._lat_band(lat, np.degrees(radius_km / EARTH_RADIUS_KM))
+        distances = haversine_km(lat, lon, lats, lons)
+        mask = distances <= radius_km
+        ids, distances = ids[mask], distances[mask]
+        order = np.lexsort((ids, distances))
+        return list(zip(ids[order].tolist(), distances[order].tolist()))
+
+    def within_rect(
+        self, min_lat: float, max_lat: float, min_lon: float, max_lon: float
+    ) -> list[int]:
+        ids, _, lons = self._lat_band((min_lat + max_lat) / 2, (max_lat - min_lat) / 2)
+        mask = (lons >= min_lon) & (lons <= max_lon)
+        return ids[mask].tolist()
+
+    def _lat_band(
+        self, lat: float, delta: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._dirty:
+            self._compile()
+        start = np.searchsorted(self._lats, lat - delta, side='left')
+        stop = np.searchsorted(self._lats, lat + delta, side='right')
+        return self._ids[start:stop], self._lats[start:stop], self._lons[start:stop]
+
+    def _compile(self) -> None:
+        ids = np.fromiter(self._points.keys(), dtype=np.int64, count=len(self._points))
+        coords = np.array(list(self._points.values()), dtype=np.float64).reshape(-1, 2)
+        order = np.argsort(coords[:, 0], kind='stable')
+        self._ids = ids[order]
+        self._lats = coords[order, 0]
+        self._lons = coords[order, 1]
+        self._dirty = False
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, Column, Float, ForeignKey, Index, Integer, String, func
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import declarative_base, relationship
 
@@ -8,7 +8,24 @@ Base = declarative_base()
 class OrganizationActivity(Base):
     __tablename__ = 'organization_activity'
     organization_id = Column(Integer, ForeignKey('organizations.id'), primary_key=True)
-    activity_id = Column(Integer, ForeignKey('activities.id'), primary_key=True)
+    activity_id = Column(Integer, ForeignKey('activities.id'), primary_key=True, index=True)
+
+
+class ActivityClosure(Base):
+    __tablename__ = 'activity_closure'
+    ancestor_id = Column(
+        Integer, ForeignKey('activities.id', ondelete='CASCADE'), primary_key=True
+    )
+    descendant_id = Column(
+        Integer, ForeignKey('activities.id', ondelete='CASCADE'), primary_key=True, index=True
+    )
+    depth = Column(Integer, nullable=False)
+
+
+class TableVersion(Base):
+    __tablename__ = 'table_versions'
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default='0')
 
 
 class Building(Base):
@@ -19,6 +36,14 @@ class Building(Base):
     longitude = Column(Float)
     organizations = relationship('Organization', back_populates='building')
 
+    __table_args__ = (
+        Index(
+            'ix_buildings_earth',
+            func.ll_to_earth(latitude, longitude),
+            postgresql_using='gist',
+        ),
+    )
+
 
 class Activity(Base):
     __tablename__ = 'activities'
@@ -36,8 +61,19 @@ class Organization(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     phones = Column(ARRAY(String))
-    building_id = Column(Integer, ForeignKey('buildings.id'))
+    building_id = Column(Integer, ForeignKey('buildings.id'), index=True)
     building = relationship('Building', back_populates='organizations')
     activities = relationship(
         'Activity', secondary='organization_activity', back_populates='organizations'
     )
+
+    __table_args__ = (
+        Index(
+            'ix_organizations_name_trgm',
+            name,
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'},
+        ),
+        # "C" collation both matches LIKE 'prefix%' and returns rows in the suggestion order
+        Index('ix_organizations_name_prefix', func.lower(name).collate('C'), id),
+    )
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class LeaderCancelled(Exception):
+    pass
+
+
+class SingleFlight:
+    def __init__(self, window: float = 0.0, maxsize: int = 1000):
+        self.window = window
+        self.maxsize = maxsize
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._results: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def clear(self) -> None:
+        self._results.clear()
+
+    def _cached(self, key: Hashable) -> tuple[bool, Any]:
+        entry = self._results.get(key)
+        if entry is None:
+            return False, None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del self._results[key]
+            return False, None
+        return True, result
+
+    def _remember(self, key: Hashable, result: Any) -> None:
+        now = time.monotonic()
+        self._results[key] = (now + self.window, result)
+        self._results.move_to_end(key)
+        # the window is the same for every entry, so the oldest entries expire first
+        while self._results:
+            oldest, (expires_at, _) = next(iter(self._results.items()))
+            if expires_at > now and len(self._results) <= self.maxsize:
+                break
+            del self._results[oldest]
+
+    async def run(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        while True:
+            hit, result = self._cached(key)
+            if hit:
+                return result
+            future = self._inflight.get(key)
+            if future is None:
+                break
+            try:
+                # shielded: a follower that goes away must not cancel the shared call
+                return await asyncio.shield(future)
+            except LeaderCancelled:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # the followers' requests are still alive: one of them takes over
+            future.set_exception(LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as error:
+            future.set_exception(error)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            if self.window > 0:
+                self._remember(key, result)
+            return result
+        finally:
+            del self._inflight[key]
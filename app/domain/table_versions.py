@@ -0,0 +1,46 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable
+
+Loader = Callable[[], Awaitable[dict[str, int]]]
+
+
+class TableVersions:
+    def __init__(self, loader: Loader, max_age: float = 5.0):
+        self.loader = loader
+        self.max_age = max_age
+        self._versions: dict[str, int] = {}
+        self._loaded_at: float | None = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        self._listener = None
+
+    @property
+    def live(self) -> bool:
+        return self._listener is not None and self._listener.connected
+
+    def watch(self, listener) -> None:
+        self._listener = listener
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._loaded_at = None
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.max_age
+
+    async def get(self, tables: Iterable[str], loader: Loader | None = None) -> tuple[int, ...]:
+        if loader is not None:
+            versions = await loader()
+        elif not self.live:
+            versions = await self.loader()
+        else:
+            if not self._fresh():
+                async with self._lock:
+                    if not self._fresh():
+                        generation = self._generation
+                        self._versions = await self.loader()
+                        if generation == self._generation:
+                            self._loaded_at = time.monotonic()
+            versions = self._versions
+        return tuple(versions.get(table, 0) for table in tables)
@@ -1,6 +1,66 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from uuid import uuid4
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from app.domain.entities import TableVersion
+from app.infrastructure.instrumentation import instrument
+from app.infrastructure.pool import MeteredQueuePool
 from app.settings import settings
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.ECHO)
+
+def _connect_args() -> dict:
+    if settings.DB_TRANSACTION_POOLER:
+        # a transaction pooler hands out a different server connection per transaction, so
+        # prepared statements must not outlive it and their names must not collide
+        return {
+            'statement_cache_size': 0,
+            'prepared_statement_cache_size': 0,
+            'prepared_statement_name_func': lambda: f'__asyncpg_{uuid4()}__',
+        }
+    return {
+        'statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+        'prepared_statement_cache_size': settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+
+def make_engine(url: str) -> AsyncEngine:
+    engine = create_async_engine(
+        url,
+        echo=settings.ECHO,
+        poolclass=MeteredQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=_connect_args(),
+    )
+    instrument(
+        engine,
+        settings.SLOW_QUERY_THRESHOLD,
+        settings.N_PLUS_ONE_THRESHOLD if settings.DEBUG else None,
+    )
+    return engine
+
+
+engine = make_engine(settings.DATABASE_URL)
+# GET requests run in READ ONLY transactions, so a stray write fails instead of committing;
+# at the engine's READ COMMITTED level DEFERRABLE would have no effect, so it is not set
+read_only_engine = engine.execution_options(postgresql_readonly=True)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def load_table_versions(session: AsyncSession | None = None) -> dict[str, int]:
+    stmt = select(TableVersion.table_name, TableVersion.version)
+    if session is not None:
+        result = await session.execute(stmt)
+        return dict(result.all())
+    async with engine.connect() as connection:
+        result = await connection.execute(stmt)
+        return dict(result.all())
@@ -1,18 +1,79 @@
+from typing import AsyncIterable
+
 from dishka import Provider, Scope, make_async_container, provide
+from dishka.integrations.fastapi import FastapiProvider
+from fastapi import Request
+from sqlalchemy import make_url
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from app.domain.abc_repositories import (
     AbstractActivityRepository,
     AbstractBuildingRepository,
+    AbstractImportRepository,
     AbstractOrganizationRepository,
+    AbstractUnitOfWork,
+)
+from app.domain.activity_tree import ActivityTree
+from app.domain.building_index import BuildingIndex
+from app.domain.entities import Activity, Building
+from app.domain.entity_cache import EntityCache
+from app.domain.single_flight import SingleFlight
+from app.domain.table_versions import TableVersions
+from app.infrastructure.database import (
+    AsyncSessionLocal,
+    engine,
+    load_table_versions,
+    make_engine,
+    read_only_engine,
 )
-from app.infrastructure.database import AsyncSessionLocal, engine
+from app.infrastructure.invalidation import Handler, InvalidationListener
+from app.infrastructure.replicas import ReadSession, ReplicaSet, consistency
 from app.infrastructure.repositories.activity import ActivityRepository
 from app.infrastructure.repositories.building import BuildingRepository
+from app.infrastructure.repositories.bulk_import import BulkImportRepository
+from app.infrastructure.repositories.cached import (
+    CachedActivityRepository,
+    CachedBuildingRepository,
+    CachedOrganizationRepository,
+    evict,
+)
 from app.infrastructure.repositories.organization import OrganizationRepository
+from app.infrastructure.unit_of_work import SqlAlchemyUnitOfWork
 from app.services.activity import ActivityService
 from app.services.building import BuildingService
+from app.services.bulk_import import BulkImportService
 from app.services.organiztion import OrganizationService
+from app.settings import settings
+
+
+def _invalidation_handler(
+    cache: EntityCache, activity_tree: ActivityTree, building_index: BuildingIndex
+) -> Handler:
+    def handle(table: str | None, entity_id: int | None, local: bool) -> None:
+        if table is None:
+            cache.clear()
+            activity_tree.invalidate()
+            building_index.invalidate()
+            return
+        evict(cache, table, entity_id)
+        if local:
+            return
+        if table == Activity.__tablename__:
+            activity_tree.invalidate()
+        elif table == Building.__tablename__:
+            building_index.invalidate()
+
+    return handle
+
+
+def _min_lsn() -> int | None:
+    state = consistency.get()
+    return state.min_lsn if state is not None else None
+
+
+def _read_only(request: Request) -> bool:
+    # POST lookups such as /batch are marked read-only by their route
+    return request.method in ('GET', 'HEAD') or getattr(request.state, 'read_only', False)
 
 
 class DatabaseProvider(Provider):
@@ -24,47 +85,211 @@ class DatabaseProvider(Provider):
     def sessionmaker(self, engine: AsyncEngine) -> async_sessionmaker:
         return AsyncSessionLocal
 
+    @provide(scope=Scope.APP)
+    async def replica_set(self) -> AsyncIterable[ReplicaSet]:
+        replicas = ReplicaSet(
+            [
+                make_engine(url).execution_options(postgresql_readonly=True)
+                for url in settings.REPLICA_DATABASE_URLS
+            ],
+            settings.REPLICA_MAX_LAG,
+            settings.REPLICA_LAG_CHECK_INTERVAL,
+        )
+        await replicas.start()
+        yield replicas
+        await replicas.stop()
+
     @provide(scope=Scope.REQUEST)
-    async def session(self, sessionmaker: async_sessionmaker) -> AsyncSession:
-        session = sessionmaker()
+    async def session(
+        self, sessionmaker: async_sessionmaker, request: Request
+    ) -> AsyncIterable[AsyncSession]:
+        # one transaction per request, committed by the service through the unit of work;
+        # whatever is left uncommitted when the request ends is rolled back by close()
+        session = sessionmaker(bind=read_only_engine) if _read_only(request) else sessionmaker()
         try:
-            return session
+            yield session
         finally:
             await session.close()
 
+    @provide(scope=Scope.REQUEST)
+    async def read_session(
+        self,
+        session: AsyncSession,
+        sessionmaker: async_sessionmaker,
+        request: Request,
+        replicas: ReplicaSet,
+    ) -> AsyncIterable[ReadSession]:
+        replica = replicas.choose(_min_lsn()) if _read_only(request) else None
+        if replica is None:
+            yield session
+            return
+        read_session = sessionmaker(bind=replica, info={'replica': True})
+        try:
+            yield read_session
+        finally:
+            await read_session.close()
+
+
+class CacheProvider(Provider):
+    @provide(scope=Scope.APP)
+    def activity_tree(self) -> ActivityTree:
+        return ActivityTree()
+
+    @provide(scope=Scope.APP)
+    def building_index(self) -> BuildingIndex:
+        return BuildingIndex()
+
+    @provide(scope=Scope.APP)
+    def entity_cache(self) -> EntityCache:
+        return EntityCache(settings.ENTITY_CACHE_SIZE, settings.ENTITY_CACHE_TTL)
+
+    @provide(scope=Scope.APP)
+    def single_flight(self) -> SingleFlight:
+        return SingleFlight(settings.SINGLE_FLIGHT_WINDOW, settings.SINGLE_FLIGHT_MAX_ENTRIES)
+
+    @provide(scope=Scope.APP)
+    def table_versions(self) -> TableVersions:
+        return TableVersions(load_table_versions, settings.TABLE_VERSIONS_MAX_AGE)
+
+    @provide(scope=Scope.APP)
+    async def invalidation_listener(
+        self,
+        cache: EntityCache,
+        activity_tree: ActivityTree,
+        building_index: BuildingIndex,
+        table_versions: TableVersions,
+        single_flight: SingleFlight,
+    ) -> AsyncIterable[InvalidationListener]:
+        dsn = make_url(settings.DATABASE_URL).set(drivername='postgresql')
+        listener = InvalidationListener(
+            dsn.render_as_string(hide_password=False),
+            [
+                _invalidation_handler(cache, activity_tree, building_index),
+                lambda table, entity_id, local: table_versions.invalidate(),
+                lambda table, entity_id, local: single_flight.clear(),
+            ],
+            keepalive=settings.INVALIDATION_KEEPALIVE,
+        )
+        table_versions.watch(listener)
+        await listener.start()
+        yield listener
+        await listener.stop()
+
 
 class RepositoryProvider(Provider):
     @provide(scope=Scope.REQUEST)
-    def building_repo(self, session: AsyncSession) -> AbstractBuildingRepository:
+    def building_repo(
+        self, session: AsyncSession, cache: EntityCache
+    ) -> AbstractBuildingRepository:
+        if settings.ENTITY_CACHE_ENABLED:
+            return CachedBuildingRepository(session, cache)
         return BuildingRepository(session)
 
     @provide(scope=Scope.REQUEST)
-    def activity_repo(self, session: AsyncSession) -> AbstractActivityRepository:
+    def activity_repo(
+        self, session: AsyncSession, cache: EntityCache
+    ) -> AbstractActivityRepository:
+        if settings.ENTITY_CACHE_ENABLED:
+            return CachedActivityRepository(session, cache)
         return ActivityRepository(session)
 
     @provide(scope=Scope.REQUEST)
-    def organization_repo(self, session: AsyncSession) -> AbstractOrganizationRepository:
-        return OrganizationRepository(session)
+    def organization_repo(
+        self, session: AsyncSession, read_session: ReadSession, cache: EntityCache
+    ) -> AbstractOrganizationRepository:
+        if settings.ENTITY_CACHE_ENABLED:
+            return CachedOrganizationRepository(session, cache, read_session)
+        return OrganizationRepository(session, read_session)
+
+    @provide(scope=Scope.REQUEST)
+    def import_repo(self, session: AsyncSession) -> AbstractImportRepository:
+        return BulkImportRepository(session)
+
+    @provide(scope=Scope.REQUEST)
+    def unit_of_work(self, session: AsyncSession) -> AbstractUnitOfWork:
+        return SqlAlchemyUnitOfWork(session)
 
 
 class ServiceProvider(Provider):
     @provide(scope=Scope.REQUEST)
-    def building_service(self, repo: AbstractBuildingRepository) -> BuildingService:
-        return BuildingService(repo)
+    def building_service(
+        self,
+        repo: AbstractBuildingRepository,
+        uow: AbstractUnitOfWork,
+        building_index: BuildingIndex,
+    ) -> BuildingService:
+        return BuildingService(repo, uow, building_index)
 
     @provide(scope=Scope.REQUEST)
-    def activity_service(self, repo: AbstractActivityRepository) -> ActivityService:
-        return ActivityService(repo)
+    def activity_service(
+        self,
+        repo: AbstractActivityRepository,
+        uow: AbstractUnitOfWork,
+        activity_tree: ActivityTree,
+    ) -> ActivityService:
+        return ActivityService(repo, uow, activity_tree, settings.ACTIVITY_MAX_DEPTH)
 
     @provide(scope=Scope.REQUEST)
     def organization_service(
         self,
         org_repo: AbstractOrganizationRepository,
-        activity_repo: AbstractActivityRepository,
         building_repo: AbstractBuildingRepository,
+        uow: AbstractUnitOfWork,
+        building_index: BuildingIndex,
+        single_flight: SingleFlight,
     ) -> OrganizationService:
-        return OrganizationService(org_repo, activity_repo, building_repo)
+        return OrganizationService(
+            org_repo,
+            building_repo,
+            uow,
+            building_index if settings.BUILDING_INDEX_ENABLED else None,
+            # a client reading its own writes must not join a flight started on a replica
+            single_flight
+            if settings.SINGLE_FLIGHT_ENABLED and _min_lsn() is None
+            else None,
+        )
+
+    @provide(scope=Scope.REQUEST)
+    def import_service(
+        self,
+        import_repo: AbstractImportRepository,
+        uow: AbstractUnitOfWork,
+        activity_tree: ActivityTree,
+        building_index: BuildingIndex,
+        table_versions: TableVersions,
+    ) -> BulkImportService:
+        return BulkImportService(
+            import_repo,
+            uow,
+            activity_tree,
+            building_index,
+            table_versions,
+            settings.ACTIVITY_MAX_DEPTH,
+            settings.IMPORT_BATCH_SIZE,
+        )
 
 
 def create_container():
-    return make_async_container(DatabaseProvider(), RepositoryProvider(), ServiceProvider())
+    return make_async_container(
+        FastapiProvider(),
+        DatabaseProvider(),
+        CacheProvider(),
+        RepositoryProvider(),
+        ServiceProvider(),
+    )
+
+
+def create_import_service(
+    session: AsyncSession, batch_size: int = settings.IMPORT_BATCH_SIZE
+) -> BulkImportService:
+    # for scripts outside the app: these caches are private to the process, running
+    # servers drop theirs on the NOTIFY the import commits
+    return BulkImportService(
+        BulkImportRepository(session),
+        SqlAlchemyUnitOfWork(session),
+        ActivityTree(),
+        BuildingIndex(),
+        TableVersions(load_table_versions, settings.TABLE_VERSIONS_MAX_AGE),
+        settings.ACTIVITY_MAX_DEPTH,
+        batch_size,
+    )
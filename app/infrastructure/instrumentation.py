@@ -0,0 +1,89 @@
+import logging
+import sys
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from greenlet import getcurrent
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+MAX_LOGGED_PARAMETERS = 1000
+
+
+class QueryStats:
+    __slots__ = ('statements', 'duration', 'shapes')
+
+    def __init__(self):
+        self.statements = 0
+        self.duration = 0.0
+        self.shapes: Counter[str] = Counter()
+
+
+# statements issued while handling the current request; None outside of requests
+query_stats: ContextVar[QueryStats | None] = ContextVar('query_stats', default=None)
+
+
+def _caller() -> str | None:
+    # the session runs statements in a greenlet whose own stack ends at the driver call;
+    # the awaiting coroutines (repository methods) live on the parent greenlet's stack
+    current, frame = getcurrent(), sys._getframe(1)
+    while True:
+        while frame is not None:
+            module = frame.f_globals.get('__name__', '')
+            name = frame.f_code.co_name
+            if module.startswith('app.') and module != __name__ and not name.startswith('_'):
+                owner = frame.f_locals.get('self')
+                if owner is None:
+                    return f'{module}.{name}'
+                return f'{type(owner).__name__}.{name}'
+            frame = frame.f_back
+        current = current.parent
+        if current is None:
+            return None
+        frame = current.gr_frame
+
+
+def _parameters(parameters) -> str:
+    text = repr(parameters)
+    if len(text) > MAX_LOGGED_PARAMETERS:
+        return f'{text[:MAX_LOGGED_PARAMETERS]}...'
+    return text
+
+
+def instrument(
+    engine: AsyncEngine, slow_threshold: float, n_plus_one_threshold: int | None = None
+) -> None:
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._started
+        if 0 < slow_threshold <= elapsed:
+            logger.warning(
+                'Медленный запрос (%.1f мс) из %s: %s; параметры: %s',
+                elapsed * 1000,
+                _caller(),
+                statement,
+                _parameters(parameters),
+            )
+        stats = query_stats.get()
+        if stats is None:
+            return
+        stats.statements += 1
+        stats.duration += elapsed
+        if n_plus_one_threshold is None:
+            return
+        # the statement text is the shape: parameters are bound separately
+        stats.shapes[statement] += 1
+        if stats.shapes[statement] == n_plus_one_threshold:
+            logger.warning(
+                'Возможный N+1: запрос выполнен %d раз за один запрос к API из %s: %s',
+                n_plus_one_threshold,
+                _caller(),
+                statement,
+            )
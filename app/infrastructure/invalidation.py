@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import uuid
+from typing import Callable, Iterable
+
+import asyncpg
+from sqlalchemy import func, select
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'secunda_invalidation'
+ORIGIN = uuid.uuid4().hex
+
+# table, entity id (None for bulk writes), whether the write came from this process; table is
+# None after a reconnect, when notifications may have been missed and everything has to be dropped
+Handler = Callable[[str | None, int | None, bool], None]
+
+
+def notify(table: str, entity_id: int | None = None):
+    key = '' if entity_id is None else entity_id
+    return select(func.pg_notify(CHANNEL, f'{table}:{key}:{ORIGIN}'))
+
+
+def notify_column(table: str, entity_id):
+    # same payload as notify(), for statements that learn the id only while writing the row
+    return func.pg_notify(CHANNEL, func.concat(f'{table}:', entity_id, f':{ORIGIN}'))
+
+
+class InvalidationListener:
+    def __init__(
+        self,
+        dsn: str,
+        handlers: Iterable[Handler],
+        keepalive: float = 30.0,
+        reconnect_delay: float = 1.0,
+    ):
+        self.dsn = dsn
+        self.handlers = list(handlers)
+        self.keepalive = keepalive
+        self.reconnect_delay = reconnect_delay
+        self.connected = False
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        first = True
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                await connection.add_listener(CHANNEL, self._on_notification)
+                self.connected = True
+                if not first:
+                    self._dispatch(None, None, False)
+                while True:
+                    await asyncio.sleep(self.keepalive)
+                    await connection.execute('SELECT 1')
+            except Exception:
+                logger.exception('Потеряно соединение для LISTEN %s', CHANNEL)
+            finally:
+                self.connected = False
+                if connection is not None:
+                    await self._close(connection)
+            first = False
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _close(self, connection: asyncpg.Connection) -> None:
+        try:
+            await connection.close(timeout=5)
+        except Exception:
+            connection.terminate()
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            table, entity_id, origin = payload.split(':')
+            self._dispatch(table, int(entity_id) if entity_id else None, origin == ORIGIN)
+        except ValueError:
+            logger.warning('Некорректное уведомление об изменении: %r', payload)
+
+    def _dispatch(self, table: str | None, entity_id: int | None, local: bool) -> None:
+        for handler in self.handlers:
+            handler(table, entity_id, local)
@@ -0,0 +1,67 @@
+import time
+from bisect import bisect_left
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def _exhausted(self) -> bool:
+        # no idle connection and no room to open one: the checkout has to wait for a checkin
+        return (
+            self._max_overflow > -1
+            and self.checkedin() == 0
+            and self.overflow() >= self._max_overflow
+        )
+
+    def connect(self):
+        self.checkouts += 1
+        blocked = self._exhausted()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            # only checkouts that queued are observed, so the histogram is not flooded with
+            # the near-zero samples of every checkout served straight from the pool
+            if blocked:
+                self._observe(time.perf_counter() - started)
+
+    def _observe(self, wait: float) -> None:
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self._wait_counts[bisect_left(WAIT_BUCKETS, wait)] += 1
+
+    def wait_buckets(self) -> dict[str, int]:
+        buckets, total = {}, 0
+        for bound, count in zip((*map(str, WAIT_BUCKETS), '+Inf'), self._wait_counts):
+            total += count
+            buckets[bound] = total
+        return buckets
+
+    def stats(self) -> dict:
+        return {
+            'size': self.size(),
+            'max_overflow': self._max_overflow,
+            'timeout': self.timeout(),
+            'in_use': self.checkedout(),
+            'idle': self.checkedin(),
+            'overflow': max(self.overflow(), 0),
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'wait_seconds_total': self.wait_total,
+            'wait_seconds_max': self.wait_max,
+            'wait_buckets': self.wait_buckets(),
+        }
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Iterable, NewType
+
+from sqlalchemy import String, case, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+logger = logging.getLogger(__name__)
+
+# session for read-only queries: bound to a replica when one is usable, otherwise the primary
+ReadSession = NewType('ReadSession', AsyncSession)
+
+REPLICATION_LAG = select(
+    case(
+        (~func.pg_is_in_recovery(), 0.0),
+        (func.pg_last_wal_receive_lsn() == func.pg_last_wal_replay_lsn(), 0.0),
+        else_=func.extract('epoch', func.now() - func.pg_last_xact_replay_timestamp()),
+    ),
+    cast(
+        case(
+            (func.pg_is_in_recovery(), func.pg_last_wal_replay_lsn()),
+            else_=func.pg_current_wal_lsn(),
+        ),
+        String,
+    ),
+)
+CURRENT_LSN = select(cast(func.pg_current_wal_lsn(), String))
+
+
+def parse_lsn(value: str | None) -> int | None:
+    # 'XXXXXXXX/YYYYYYYY', the textual pg_lsn form
+    high, slash, low = (value or '').partition('/')
+    if not slash:
+        return None
+    try:
+        return (int(high, 16) << 32) + int(low, 16)
+    except ValueError:
+        return None
+
+
+class Consistency:
+    __slots__ = ('min_lsn', 'commit_lsn')
+
+    def __init__(self, min_lsn: int | None = None):
+        # the client's last write: replicas that have not replayed it must not serve the read
+        self.min_lsn = min_lsn
+        # set once this request commits a write; handed back to the client as its token
+        self.commit_lsn: str | None = None
+
+
+# read-your-writes state of the current request; None when no replicas are configured
+consistency: ContextVar[Consistency | None] = ContextVar('consistency', default=None)
+
+
+class ReplicaSet:
+    def __init__(self, engines: Iterable[AsyncEngine], max_lag: float, interval: float = 1.0):
+        self.engines = list(engines)
+        self.max_lag = max_lag
+        self.interval = interval
+        self.lags: list[float | None] = [None] * len(self.engines)
+        self.replayed: list[int | None] = [None] * len(self.engines)
+        self._failing = [False] * len(self.engines)
+        self._next = 0
+        self._task: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        if self.engines and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for engine in self.engines:
+            await engine.dispose()
+
+    async def _run(self) -> None:
+        while True:
+            await self._check()
+            await asyncio.sleep(self.interval)
+
+    async def _check(self) -> None:
+        for position, engine in enumerate(self.engines):
+            try:
+                self.lags[position], self.replayed[position] = await asyncio.wait_for(
+                    self._measure(engine), timeout=max(self.max_lag, self.interval)
+                )
+                self._failing[position] = False
+            except Exception:
+                if not self._failing[position]:
+                    logger.exception('Реплика %s недоступна', engine.url)
+                self._failing[position] = True
+                self.lags[position] = self.replayed[position] = None
+
+    async def _measure(self, engine: AsyncEngine) -> tuple[float, int | None]:
+        async with engine.connect() as connection:
+            lag, replayed = (await connection.execute(REPLICATION_LAG)).one()
+            return float(lag or 0.0), parse_lsn(replayed)
+
+    def choose(self, min_lsn: int | None = None) -> AsyncEngine | None:
+        # replay only moves forward, so a position measured a moment ago is a safe lower bound
+        for _ in range(len(self.engines)):
+            position = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            lag, replayed = self.lags[position], self.replayed[position]
+            if lag is None or lag > self.max_lag:
+                continue
+            if min_lsn is not None and (replayed is None or replayed < min_lsn):
+                continue
+            return self.engines[position]
+        return None
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                'url': engine.url.render_as_string(hide_password=True),
+                'lag': lag,
+                'healthy': lag is not None and lag <= self.max_lag,
+            }
+            for engine, lag in zip(self.engines, self.lags)
+        ]
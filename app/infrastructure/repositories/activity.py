@@ -1,11 +1,11 @@
 from typing import List
 
-from sqlalchemy import Integer, func, select
+from sqlalchemy import Integer, delete, func, insert, literal, select, true
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import aliased
 
 from app.domain.abc_repositories import AbstractActivityRepository
-from app.domain.entities import Activity
+from app.domain.entities import Activity, ActivityClosure
 from app.infrastructure.repositories.base import BaseSqlAlchemyRepository
 
 
@@ -13,35 +13,47 @@ class ActivityRepository(BaseSqlAlchemyRepository[Activity], AbstractActivityRep
     def __init__(self, session: AsyncSession):
         super().__init__(session, Activity)
 
+    async def create(self, **kwargs) -> Activity:
+        written = self._written(insert(Activity).values(**kwargs))
+        closure = (
+            insert(ActivityClosure)
+            .from_select(
+                ['ancestor_id', 'descendant_id', 'depth'],
+                select(written.c.id, written.c.id, literal(0)).union_all(
+                    select(ActivityClosure.ancestor_id, written.c.id, ActivityClosure.depth + 1)
+                    .select_from(ActivityClosure)
+                    .join(written, ActivityClosure.descendant_id == written.c.parent_id)
+                ),
+            )
+            .cte('closure')
+        )
+        return await self._write(written, closure)
+
+    async def update(self, activity: Activity, **kwargs) -> Activity:
+        parent_id = kwargs.get('parent_id')
+        moved = parent_id is not None and parent_id != activity.parent_id
+        activity = await super().update(activity, **kwargs)
+        if moved:
+            await self._move_subtree(activity.id, parent_id)
+        return activity
+
     async def get_by_name(self, name: str) -> Activity | None:
         result = await self.session.execute(select(Activity).filter(Activity.name == name))
         return result.scalars().first()
 
+    async def get_hierarchy(self) -> List[tuple[int, int | None]]:
+        result = await self.session.execute(select(Activity.id, Activity.parent_id))
+        return [(row.id, row.parent_id) for row in result]
+
     async def get_sub_activities(self, activity_id: int, depth: int = 3) -> List[Activity]:
         if depth <= 0:
             return []
 
-        root = await self.get_by_id(activity_id)
-        if not root:
-            return []
-
-        base = (
-            select(Activity.id, Activity.parent_id, func.cast(0, Integer).label('level'))
-            .where(Activity.id == activity_id)
-            .cte(name='activity_tree', recursive=True)
+        stmt = (
+            select(Activity)
+            .join(ActivityClosure, ActivityClosure.descendant_id == Activity.id)
+            .where(ActivityClosure.ancestor_id == activity_id, ActivityClosure.depth <= depth)
         )
-
-        activity_alias = aliased(Activity)
-        recursive = (
-            select(activity_alias.id, activity_alias.parent_id, (base.c.level + 1).label('level'))
-            .select_from(activity_alias)
-            .where(activity_alias.parent_id == base.c.id)
-            .where(base.c.level < depth)
-        )
-
-        cte = base.union_all(recursive)
-
-        stmt = select(Activity).where(Activity.id.in_(select(cte.c.id)))
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
@@ -49,22 +61,61 @@ class ActivityRepository(BaseSqlAlchemyRepository[Activity], AbstractActivityRep
         if activity_id is None:
             return 0
 
-        base = select(Activity.id, Activity.parent_id, func.cast(0, Integer).label('depth')).where(
-            Activity.id == activity_id
+        stmt = select(func.coalesce(func.max(ActivityClosure.depth), 0)).where(
+            ActivityClosure.descendant_id == activity_id
         )
+        result = await self.session.execute(stmt)
+        return result.scalar()
 
-        cte = base.cte(name='activity_path', recursive=True)
+    async def rebuild_closure(self) -> None:
+        base = select(
+            Activity.id.label('ancestor_id'),
+            Activity.id.label('descendant_id'),
+            func.cast(0, Integer).label('depth'),
+        ).cte(name='activity_tree', recursive=True)
 
         activity_alias = aliased(Activity)
-
         recursive = (
-            select(activity_alias.id, activity_alias.parent_id, (cte.c.depth + 1).label('depth'))
+            select(base.c.ancestor_id, activity_alias.id, (base.c.depth + 1).label('depth'))
             .select_from(activity_alias)
-            .where(activity_alias.id == cte.c.parent_id)
+            .where(activity_alias.parent_id == base.c.descendant_id)
+        )
+        cte = base.union_all(recursive)
+
+        await self.session.execute(delete(ActivityClosure))
+        await self.session.execute(
+            insert(ActivityClosure).from_select(
+                ['ancestor_id', 'descendant_id', 'depth'],
+                select(cte.c.ancestor_id, cte.c.descendant_id, cte.c.depth),
+            )
         )
 
-        cte = cte.union_all(recursive)
+    async def _move_subtree(self, activity_id: int, parent_id: int) -> None:
+        subtree = select(ActivityClosure.descendant_id).where(
+            ActivityClosure.ancestor_id == activity_id
+        )
+        await self.session.execute(
+            delete(ActivityClosure).where(
+                ActivityClosure.descendant_id.in_(subtree),
+                ActivityClosure.ancestor_id.not_in(subtree),
+            )
+        )
 
-        stmt = select(func.coalesce(func.max(cte.c.depth), 0))
-        result = await self.session.execute(stmt)
-        return result.scalar()
+        ancestors = aliased(ActivityClosure)
+        descendants = aliased(ActivityClosure)
+        await self.session.execute(
+            insert(ActivityClosure).from_select(
+                ['ancestor_id', 'descendant_id', 'depth'],
+                select(
+                    ancestors.ancestor_id,
+                    descendants.descendant_id,
+                    ancestors.depth + descendants.depth + 1,
+                )
+                .select_from(ancestors)
+                .join(descendants, true())
+                .where(
+                    ancestors.descendant_id == parent_id,
+                    descendants.ancestor_id == activity_id,
+                ),
+            )
+        )
@@ -1,9 +1,12 @@
 from typing import List, Type, TypeVar
 
-from sqlalchemy import select
+from sqlalchemy import Integer, any_, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from app.domain.abc_repositories import AbstractRepository
+from app.domain.abc_repositories import AbstractRepository, EntityNotFound
+from app.infrastructure.invalidation import notify, notify_column
 
 T = TypeVar('T')
 
@@ -13,6 +16,27 @@ class BaseSqlAlchemyRepository(AbstractRepository[T]):
         self.session = session
         self.model = model
 
+    async def _notify(self, entity_id: int) -> None:
+        await self.session.execute(notify(self.model.__tablename__, entity_id))
+
+    def _written(self, stmt):
+        return stmt.returning(*self.model.__table__.c).cte('written')
+
+    async def _write(self, written, *ctes, entity_id: int | None = None) -> T:
+        # one round trip: the data-modifying CTE, any dependent writes and the notification;
+        # an UPDATE or DELETE of the row with entity_id that matches nothing raises
+        stmt = select(
+            aliased(self.model, written),
+            notify_column(self.model.__tablename__, written.c.id),
+        )
+        for cte in ctes:
+            stmt = stmt.add_cte(cte)
+        result = await self.session.execute(stmt.execution_options(populate_existing=True))
+        row = result.first()
+        if row is None:
+            raise EntityNotFound(entity_id)
+        return row[0]
+
     async def get_all(self) -> List[T]:
         result = await self.session.execute(select(self.model))
         return result.scalars().all()
@@ -21,21 +45,26 @@ class BaseSqlAlchemyRepository(AbstractRepository[T]):
         result = await self.session.execute(select(self.model).filter(self.model.id == entity_id))
         return result.scalars().first()
 
+    async def get_by_ids(self, entity_ids: list[int]) -> List[T]:
+        if not entity_ids:
+            return []
+        ids = literal(entity_ids, ARRAY(Integer))
+        result = await self.session.execute(select(self.model).where(self.model.id == any_(ids)))
+        return result.scalars().all()
+
     async def create(self, **kwargs) -> T:
-        entity = self.model(**kwargs)
-        self.session.add(entity)
-        await self.session.commit()
-        await self.session.refresh(entity)
-        return entity
+        return await self._write(self._written(insert(self.model).values(**kwargs)))
 
     async def update(self, entity: T, **kwargs) -> T:
-        for key, value in kwargs.items():
-            if value is not None:
-                setattr(entity, key, value)
-        await self.session.commit()
-        await self.session.refresh(entity)
-        return entity
+        values = {key: value for key, value in kwargs.items() if value is not None}
+        if not values:
+            return entity
+        return await self._write(
+            self._written(update(self.model).where(self.model.id == entity.id).values(**values)),
+            entity_id=entity.id,
+        )
 
     async def delete(self, entity: T) -> None:
+        await self._notify(entity.id)
         await self.session.delete(entity)
-        await self.session.commit()
+        await self.session.flush()
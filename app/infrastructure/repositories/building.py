@@ -1,3 +1,6 @@
+from typing import List
+
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.abc_repositories import AbstractBuildingRepository
@@ -8,3 +11,11 @@ from app.infrastructure.repositories.base import BaseSqlAlchemyRepository
 class BuildingRepository(BaseSqlAlchemyRepository[Building], AbstractBuildingRepository):
     def __init__(self, session: AsyncSession):
         super().__init__(session, Building)
+
+    async def get_coordinates(self) -> List[tuple[int, float, float]]:
+        result = await self.session.execute(
+            select(Building.id, Building.latitude, Building.longitude).where(
+                Building.latitude.is_not(None), Building.longitude.is_not(None)
+            )
+        )
+        return [(row.id, row.latitude, row.longitude) for row in result]
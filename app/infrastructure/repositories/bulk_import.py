@@ -0,0 +1,354 @@
+from typing import AsyncIterable, AsyncIterator, List
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    exists,
+    func,
+    literal_column,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.schema import CreateTable
+
+from app.domain.abc_repositories import AbstractImportRepository
+from app.domain.entities import (
+    Activity,
+    ActivityClosure,
+    Building,
+    Organization,
+    OrganizationActivity,
+)
+from app.infrastructure.invalidation import notify
+from app.infrastructure.repositories.activity import ActivityRepository
+
+_staging = MetaData()
+
+
+def _staging_table(name: str, *columns: Column) -> Table:
+    return Table(
+        name,
+        _staging,
+        Column('row_no', Integer, nullable=False),
+        *columns,
+        Column('error', String),
+        prefixes=['TEMPORARY'],
+        postgresql_on_commit='DROP',
+    )
+
+
+staged_buildings = _staging_table(
+    'import_buildings',
+    Column('address', String),
+    Column('latitude', Float),
+    Column('longitude', Float),
+)
+staged_activities = _staging_table(
+    'import_activities',
+    Column('name', String),
+    Column('parent_id', Integer),
+    Column('parent_name', String),
+    Column('level', Integer),
+)
+staged_organizations = _staging_table(
+    'import_organizations',
+    Column('id', Integer),
+    Column('name', String),
+    Column('phones', ARRAY(String)),
+    Column('building_id', Integer),
+    Column('building_address', String),
+)
+staged_organization_activities = Table(
+    'import_organization_activities',
+    _staging,
+    Column('row_no', Integer, nullable=False),
+    Column('activity_id', Integer),
+    Column('activity_name', String),
+    prefixes=['TEMPORARY'],
+    postgresql_on_commit='DROP',
+)
+
+
+async def _batches(rows: AsyncIterable, size: int) -> AsyncIterator[list]:
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BulkImportRepository(AbstractImportRepository):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def _create(self, *tables: Table) -> None:
+        for table in tables:
+            await self.session.execute(CreateTable(table))
+
+    async def _copy(self, table: Table, records: list[tuple]) -> None:
+        if not records:
+            return
+        connection = await self.session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name, records=records, columns=[column.name for column in table.columns]
+        )
+
+    async def _reject(self, table: Table, error, *conditions) -> None:
+        await self.session.execute(
+            update(table).where(table.c.error.is_(None), *conditions).values(error=error)
+        )
+
+    async def _repeated(self, table: Table, column: str, error: str) -> None:
+        earlier = table.alias('earlier')
+        await self._reject(
+            table,
+            error,
+            exists().where(
+                earlier.c[column] == table.c[column], earlier.c.row_no < table.c.row_no
+            ),
+        )
+
+    async def _errors(self, table: Table) -> List[tuple[int, str]]:
+        result = await self.session.execute(
+            select(table.c.row_no, table.c.error)
+            .where(table.c.error.is_not(None))
+            .order_by(table.c.row_no)
+        )
+        return [(row.row_no, row.error) for row in result]
+
+    async def import_buildings(
+        self, rows: AsyncIterable[tuple[int, dict]], batch_size: int
+    ) -> tuple[int, int, List[tuple[int, str]]]:
+        staged = staged_buildings
+        await self._create(staged)
+        async for batch in _batches(rows, batch_size):
+            await self._copy(
+                staged,
+                [
+                    (row_no, row['address'], row['latitude'], row['longitude'], None)
+                    for row_no, row in batch
+                ],
+            )
+
+        await self._repeated(staged, 'address', 'Адрес повторяется в файле')
+        stmt = pg_insert(Building).from_select(
+            ['address', 'latitude', 'longitude'],
+            select(staged.c.address, staged.c.latitude, staged.c.longitude)
+            .where(staged.c.error.is_(None))
+            .order_by(staged.c.row_no),
+        )
+        # an address that already exists keeps its row and takes the file's coordinates;
+        # xmax is still 0 only for rows the statement inserted
+        written = (
+            stmt.on_conflict_do_update(
+                index_elements=[Building.address],
+                set_={'latitude': stmt.excluded.latitude, 'longitude': stmt.excluded.longitude},
+            )
+            .returning(literal_column('xmax = 0', Boolean).label('inserted'))
+            .cte('written')
+        )
+        result = await self.session.execute(
+            select(func.count(), func.count().filter(written.c.inserted.is_(False)))
+        )
+        imported, updated = result.one()
+        errors = await self._errors(staged)
+
+        await self.session.execute(notify(Building.__tablename__))
+        return imported, updated, errors
+
+    async def import_activities(
+        self, rows: AsyncIterable[tuple[int, dict]], max_depth: int, batch_size: int
+    ) -> tuple[int, List[tuple[int, str]]]:
+        staged = staged_activities
+        await self._create(staged)
+        async for batch in _batches(rows, batch_size):
+            await self._copy(
+                staged,
+                [
+                    (row_no, row['name'], row['parent_id'], row['parent_name'], None, None)
+                    for row_no, row in batch
+                ],
+            )
+
+        await self._repeated(staged, 'name', 'Вид деятельности повторяется в файле')
+        await self._reject(
+            staged,
+            func.format('Вид деятельности с именем %s уже существует', staged.c.name),
+            exists().where(Activity.name == staged.c.name),
+        )
+        await self.session.execute(
+            update(staged)
+            .where(staged.c.parent_id.is_(None), staged.c.parent_name == Activity.name)
+            .values(parent_id=Activity.id)
+        )
+        await self._reject(
+            staged,
+            'Родительский вид деятельности не обнаружен',
+            staged.c.parent_id.is_not(None),
+            ~exists().where(Activity.id == staged.c.parent_id),
+        )
+
+        await self.session.execute(
+            update(staged)
+            .where(
+                staged.c.error.is_(None),
+                staged.c.parent_id.is_(None),
+                staged.c.parent_name.is_(None),
+            )
+            .values(level=0)
+        )
+        await self.session.execute(
+            update(staged)
+            .where(staged.c.error.is_(None), staged.c.parent_id.is_not(None))
+            .values(
+                level=select(func.max(ActivityClosure.depth) + 1)
+                .where(ActivityClosure.descendant_id == staged.c.parent_id)
+                .scalar_subquery()
+            )
+        )
+        parent = staged.alias('parent')
+        while True:
+            result = await self.session.execute(
+                update(staged)
+                .where(
+                    staged.c.error.is_(None),
+                    staged.c.level.is_(None),
+                    staged.c.parent_id.is_(None),
+                    staged.c.parent_name == parent.c.name,
+                    parent.c.error.is_(None),
+                    parent.c.level.is_not(None),
+                )
+                .values(level=parent.c.level + 1)
+            )
+            if not result.rowcount:
+                break
+        await self._reject(
+            staged, 'Родительский вид деятельности не обнаружен', staged.c.level.is_(None)
+        )
+        await self._reject(
+            staged,
+            f'Превышен лимит вложенности. Максимальный уровень - {max_depth}',
+            staged.c.level >= max_depth,
+        )
+
+        imported = 0
+        for level in range(max_depth):
+            result = await self.session.execute(
+                pg_insert(Activity).from_select(
+                    ['name', 'parent_id'],
+                    select(staged.c.name, func.coalesce(staged.c.parent_id, Activity.id))
+                    .select_from(staged)
+                    .outerjoin(Activity, Activity.name == staged.c.parent_name)
+                    .where(staged.c.error.is_(None), staged.c.level == level)
+                    .order_by(staged.c.row_no),
+                )
+            )
+            imported += result.rowcount
+        await ActivityRepository(self.session).rebuild_closure()
+        errors = await self._errors(staged)
+
+        await self.session.execute(notify(Activity.__tablename__))
+        return imported, errors
+
+    async def import_organizations(
+        self, rows: AsyncIterable[tuple[int, dict]], batch_size: int
+    ) -> tuple[int, List[tuple[int, str]]]:
+        staged, links = staged_organizations, staged_organization_activities
+        await self._create(staged, links)
+        async for batch in _batches(rows, batch_size):
+            await self._copy(
+                staged,
+                [
+                    (
+                        row_no,
+                        None,
+                        row['name'],
+                        row['phones'],
+                        row['building_id'],
+                        row['building_address'],
+                        None,
+                    )
+                    for row_no, row in batch
+                ],
+            )
+            await self._copy(
+                links,
+                [
+                    (row_no, activity_id, None)
+                    for row_no, row in batch
+                    for activity_id in row['activity_ids']
+                ]
+                + [
+                    (row_no, None, activity_name)
+                    for row_no, row in batch
+                    for activity_name in row['activity_names']
+                ],
+            )
+
+        await self.session.execute(
+            update(staged)
+            .where(staged.c.building_id.is_(None), staged.c.building_address == Building.address)
+            .values(building_id=Building.id)
+        )
+        await self._reject(
+            staged,
+            func.format(
+                'Здание %s не найдено',
+                func.coalesce(staged.c.building_address, func.cast(staged.c.building_id, String)),
+            ),
+            ~exists().where(Building.id == staged.c.building_id),
+        )
+        await self.session.execute(
+            update(links)
+            .where(links.c.activity_id.is_(None), links.c.activity_name == Activity.name)
+            .values(activity_id=Activity.id)
+        )
+        await self._reject(
+            staged,
+            func.format(
+                'Вид деятельности %s не найден',
+                func.coalesce(links.c.activity_name, func.cast(links.c.activity_id, String)),
+            ),
+            links.c.row_no == staged.c.row_no,
+            ~exists().where(Activity.id == links.c.activity_id),
+        )
+
+        sequence = func.pg_get_serial_sequence(Organization.__tablename__, 'id')
+        await self.session.execute(
+            update(staged).where(staged.c.error.is_(None)).values(id=func.nextval(sequence))
+        )
+        result = await self.session.execute(
+            pg_insert(Organization).from_select(
+                ['id', 'name', 'phones', 'building_id'],
+                select(staged.c.id, staged.c.name, staged.c.phones, staged.c.building_id)
+                .where(staged.c.error.is_(None))
+                .order_by(staged.c.row_no),
+            )
+        )
+        await self.session.execute(
+            pg_insert(OrganizationActivity)
+            .from_select(
+                ['organization_id', 'activity_id'],
+                select(staged.c.id, links.c.activity_id)
+                .join(links, links.c.row_no == staged.c.row_no)
+                .where(staged.c.error.is_(None))
+                .distinct(),
+            )
+            .on_conflict_do_nothing()
+        )
+        errors = await self._errors(staged)
+
+        await self.session.execute(notify(Organization.__tablename__))
+        return result.rowcount, errors
@@ -0,0 +1,159 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import RelationshipProperty, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.domain.entities import Activity, Building, Organization
+from app.domain.entity_cache import EntityCache
+from app.infrastructure.repositories.activity import ActivityRepository
+from app.infrastructure.repositories.building import BuildingRepository
+from app.infrastructure.repositories.organization import OrganizationRepository
+
+ORGANIZATION_DOCUMENTS = 'organization_documents'
+
+DEPENDENTS = {
+    Building.__tablename__: (Organization.__tablename__, ORGANIZATION_DOCUMENTS),
+    Activity.__tablename__: (Organization.__tablename__, ORGANIZATION_DOCUMENTS),
+    Organization.__tablename__: (),
+}
+
+
+Snapshot = tuple[type, dict]
+
+
+def snapshot(entity, relations: bool = True) -> Snapshot:
+    # plain loaded values only: the cache never holds an instance bound to a session;
+    # related rows keep their columns but not their own relations, so back-references
+    # cannot cycle
+    state = inspect(entity)
+    values = {}
+    for prop in state.mapper.attrs:
+        if prop.key not in state.dict:
+            continue
+        value = state.dict[prop.key]
+        if isinstance(prop, RelationshipProperty):
+            if not relations:
+                continue
+            if prop.uselist:
+                value = [snapshot(item, relations=False) for item in value]
+            elif value is not None:
+                value = snapshot(value, relations=False)
+        elif isinstance(value, list):
+            value = list(value)
+        values[prop.key] = value
+    return state.mapper.class_, values
+
+
+def restore(cached: Snapshot):
+    # a fresh detached copy per hit, ready for merge(load=False) into the request's session
+    model, values = cached
+    state = inspect(model)
+    entity = state.class_manager.new_instance()
+    for key, value in values.items():
+        if isinstance(state.attrs[key], RelationshipProperty):
+            if isinstance(value, list):
+                value = [restore(item) for item in value]
+            elif value is not None:
+                value = restore(value)
+        elif isinstance(value, list):
+            value = list(value)
+        set_committed_value(entity, key, value)
+    make_transient_to_detached(entity)
+    return entity
+
+
+def evict(cache: EntityCache, namespace: str, entity_id: int | None = None) -> None:
+    cache.invalidate(namespace, entity_id)
+    if namespace == Organization.__tablename__:
+        cache.invalidate(ORGANIZATION_DOCUMENTS, entity_id)
+    for dependent in DEPENDENTS.get(namespace, ()):
+        cache.invalidate(dependent)
+
+
+class CachedRepositoryMixin:
+    def __init__(self, session: AsyncSession, cache: EntityCache, *args):
+        super().__init__(session, *args)
+        self.cache = cache
+        self.namespace = self.model.__tablename__
+
+    def _invalidate(self, entity_id: int) -> None:
+        evict(self.cache, self.namespace, entity_id)
+
+    def _invalidate_on_commit(self, entity_id: int) -> None:
+        # a concurrent reader may cache the old row until the write transaction commits
+        event.listen(
+            self.session.sync_session,
+            'after_commit',
+            lambda session: self._invalidate(entity_id),
+            once=True,
+        )
+
+    async def get_by_id(self, entity_id: int):
+        cached = self.cache.get(self.namespace, entity_id)
+        if cached is not None:
+            return await self.session.merge(restore(cached), load=False)
+        entity = await super().get_by_id(entity_id)
+        if entity is not None:
+            self.cache.set(self.namespace, entity_id, snapshot(entity))
+        return entity
+
+    async def get_by_ids(self, entity_ids: list[int]):
+        entities, missing = [], []
+        for entity_id in entity_ids:
+            cached = self.cache.get(self.namespace, entity_id)
+            if cached is not None:
+                entities.append(await self.session.merge(restore(cached), load=False))
+            else:
+                missing.append(entity_id)
+        for entity in await super().get_by_ids(missing):
+            self.cache.set(self.namespace, entity.id, snapshot(entity))
+            entities.append(entity)
+        return entities
+
+    async def update(self, entity, **kwargs):
+        self._invalidate(entity.id)
+        entity = await super().update(entity, **kwargs)
+        self._invalidate(entity.id)
+        self._invalidate_on_commit(entity.id)
+        return entity
+
+    async def delete(self, entity) -> None:
+        entity_id = entity.id
+        self._invalidate(entity_id)
+        await super().delete(entity)
+        self._invalidate(entity_id)
+        self._invalidate_on_commit(entity_id)
+
+
+class CachedBuildingRepository(CachedRepositoryMixin, BuildingRepository):
+    pass
+
+
+class CachedActivityRepository(CachedRepositoryMixin, ActivityRepository):
+    pass
+
+
+class CachedOrganizationRepository(CachedRepositoryMixin, OrganizationRepository):
+    async def get_document(self, org_id: int) -> dict | None:
+        document = self.cache.get(ORGANIZATION_DOCUMENTS, org_id)
+        if document is None:
+            document = await super().get_document(org_id)
+            if document is not None:
+                self.cache.set(ORGANIZATION_DOCUMENTS, org_id, document)
+        return document
+
+    async def get_documents(self, org_ids: list[int]) -> list[dict]:
+        documents, missing = [], []
+        for org_id in org_ids:
+            document = self.cache.get(ORGANIZATION_DOCUMENTS, org_id)
+            if document is not None:
+                documents.append(document)
+            else:
+                missing.append(org_id)
+        # a lagging replica could put back a document a commit has just invalidated
+        shared = not self.read_session.info.get('replica')
+        for document in await super().get_documents(missing):
+            if shared:
+                self.cache.set(ORGANIZATION_DOCUMENTS, document['id'], document)
+            documents.append(document)
+        return documents
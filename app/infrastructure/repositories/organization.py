@@ -1,153 +1,426 @@
-import math
-from typing import List
+from itertools import chain
+from typing import AsyncIterator, List
 
-from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import (
+    JSON,
+    Float,
+    Integer,
+    all_,
+    any_,
+    bindparam,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.domain.abc_repositories import AbstractOrganizationRepository
-from app.domain.entities import Activity, Building, Organization
+from app.domain.entities import (
+    Activity,
+    ActivityClosure,
+    Building,
+    Organization,
+    OrganizationActivity,
+)
 from app.infrastructure.repositories.base import BaseSqlAlchemyRepository
 
+# sorts after every other character under the "C" collation, which compares code points
+MAX_CHAR = '\U0010ffff'
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('/', '//').replace('%', '/%').replace('_', '/_')
+
+
+def _json_object(**fields):
+    pairs = ((literal_column(f"'{key}'"), value) for key, value in fields.items())
+    return func.json_build_object(*chain.from_iterable(pairs), type_=JSON)
+
 
 class OrganizationRepository(
     BaseSqlAlchemyRepository[Organization], AbstractOrganizationRepository
 ):
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, read_session: AsyncSession | None = None):
         super().__init__(session, Organization)
+        self.read_session = read_session or session
 
     def _with_relations(self, stmt):
-        return stmt.options(joinedload(Organization.building), joinedload(Organization.activities))
+        return stmt.options(
+            joinedload(Organization.building), selectinload(Organization.activities)
+        )
 
-    async def get_all(self) -> List[Organization]:
-        stmt = self._with_relations(select(Organization))
-        result = await self.session.execute(stmt)
-        return result.unique().scalars().all()
+    def _activity_subtree(self, activity_id: int):
+        return (
+            select(OrganizationActivity.organization_id)
+            .join(
+                ActivityClosure, ActivityClosure.descendant_id == OrganizationActivity.activity_id
+            )
+            .where(ActivityClosure.ancestor_id == activity_id)
+        )
+
+    def _earth_distance_km(self, lat: float, lon: float):
+        center = func.ll_to_earth(lat, lon)
+        point = func.ll_to_earth(Building.latitude, Building.longitude)
+        return center, point, func.earth_distance(center, point) / 1000.0
+
+    def _documents(self, *columns):
+        activities = (
+            select(
+                func.coalesce(
+                    func.json_agg(
+                        aggregate_order_by(
+                            _json_object(
+                                name=Activity.name, parent_id=Activity.parent_id, id=Activity.id
+                            ),
+                            Activity.id,
+                        )
+                    ),
+                    literal_column("'[]'::json"),
+                ).label('activities')
+            )
+            .select_from(OrganizationActivity)
+            .join(Activity, Activity.id == OrganizationActivity.activity_id)
+            .where(OrganizationActivity.organization_id == Organization.id)
+            .lateral('organization_activities')
+        )
+        building = case(
+            (Building.id.is_(None), None),
+            else_=_json_object(
+                address=Building.address,
+                latitude=Building.latitude,
+                longitude=Building.longitude,
+                id=Building.id,
+            ),
+        )
+        document = _json_object(
+            name=Organization.name,
+            phones=Organization.phones,
+            building_id=Organization.building_id,
+            id=Organization.id,
+            building=building,
+            activities=activities.c.activities,
+        )
+        return (
+            select(document.label('organization'), *columns)
+            .select_from(Organization)
+            .outerjoin(Building, Building.id == Organization.building_id)
+            .join(activities, true())
+        )
+
+    def _keyset(self, stmt, limit: int | None, after_id: int | None):
+        if after_id is not None:
+            stmt = stmt.where(Organization.id > after_id)
+        stmt = stmt.order_by(Organization.id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    async def _fetch(self, stmt) -> List[dict]:
+        result = await self.read_session.execute(stmt)
+        return result.scalars().all()
+
+    async def _fetch_with(self, stmt, key: str) -> List[dict]:
+        result = await self.read_session.execute(stmt)
+        return [{**document, key: value} for document, value in result.all()]
+
+    async def get_all(self, limit: int | None = None, after_id: int | None = None) -> List[dict]:
+        return await self._fetch(self._keyset(self._documents(), limit, after_id))
+
+    async def stream_all(self, batch_size: int) -> AsyncIterator[List[dict]]:
+        stmt = self._documents().order_by(Organization.id).execution_options(yield_per=batch_size)
+        result = await self.read_session.stream(stmt)
+        async for batch in result.scalars().partitions():
+            yield batch
+
+    async def get_document(self, org_id: int) -> dict | None:
+        result = await self.session.execute(self._documents().where(Organization.id == org_id))
+        return result.scalars().first()
+
+    async def get_documents(self, org_ids: list[int]) -> List[dict]:
+        if not org_ids:
+            return []
+        ids = literal(org_ids, ARRAY(Integer))
+        return await self._fetch(self._documents().where(Organization.id == any_(ids)))
 
     async def get_by_id(self, org_id: int) -> Organization | None:
         stmt = self._with_relations(select(Organization)).where(Organization.id == org_id)
         result = await self.session.execute(stmt)
-        return result.unique().scalars().first()
+        return result.scalars().first()
+
+    async def load_references(
+        self, building_id: int | None, activity_ids: list[int]
+    ) -> tuple[Building | None, list[Activity], list[int]]:
+        # one round trip for the building and every requested activity; a single
+        # placeholder row keeps the building when no activities are requested
+        requested = (
+            func.unnest(literal(activity_ids, ARRAY(Integer)))
+            .table_valued('id', with_ordinality='position')
+            .render_derived(name='requested')
+        )
+        stmt = (
+            select(Building, requested.c.id, Activity)
+            .select_from(select(literal(1).label('placeholder')).subquery('reference'))
+            .outerjoin(Building, Building.id == building_id)
+            .outerjoin(requested, true())
+            .outerjoin(Activity, Activity.id == requested.c.id)
+            .order_by(requested.c.position)
+        )
+        result = await self.session.execute(stmt)
+        building, activities, missing = None, [], []
+        for building, activity_id, activity in result.all():
+            if activity is not None:
+                activities.append(activity)
+            elif activity_id is not None:
+                missing.append(activity_id)
+        return building, activities, missing
+
+    def _link(self, written, activities: list[Activity]):
+        ids = literal([activity.id for activity in activities], ARRAY(Integer))
+        links = select(written.c.id, func.unnest(ids))
+        return (
+            pg_insert(OrganizationActivity)
+            .from_select(['organization_id', 'activity_id'], links)
+            .on_conflict_do_nothing()
+            .cte('linked')
+        )
 
     async def create(
-        self, name: str, phones: list[str], building_id: int, activity_ids: list[int]
+        self, name: str, phones: list[str], building: Building, activities: list[Activity]
     ) -> Organization:
-        if activity_ids and len(activity_ids) != len(set(activity_ids)):
-            raise HTTPException(status_code=400, detail='Обнаружены дубликаты id организаций')
+        written = self._written(
+            insert(Organization).values(name=name, phones=phones, building_id=building.id)
+        )
+        organization = await self._write(written, self._link(written, activities))
+        set_committed_value(organization, 'building', building)
+        set_committed_value(organization, 'activities', activities)
+        return organization
 
-        building = await self.session.get(Building, building_id)
-        if not building:
-            raise HTTPException(status_code=400, detail=f'Здание с id {building_id} не найдено')
+    async def update(
+        self,
+        organization: Organization,
+        name: str | None = None,
+        phones: list[str] | None = None,
+        building: Building | None = None,
+        activities: list[Activity] | None = None,
+    ) -> Organization:
+        values = {'name': name, 'phones': phones}
+        if building is not None:
+            values['building_id'] = building.id
+        values = {key: value for key, value in values.items() if value is not None}
+        if not values and activities is None:
+            return organization
 
-        activities = []
-        if activity_ids:
-            result = await self.session.execute(
-                select(Activity).where(Activity.id.in_(activity_ids))
-            )
-            activities = list(result.scalars().all())
-            if len(activities) != len(activity_ids):
-                raise HTTPException(
-                    status_code=400, detail='Один или более id организаций невалидны'
+        # a links-only change still rewrites the row so that it is returned and announced
+        written = self._written(
+            update(Organization)
+            .where(Organization.id == organization.id)
+            .values(**values or {'name': Organization.name})
+        )
+        ctes = []
+        if activities is not None:
+            ctes = [
+                delete(OrganizationActivity)
+                .where(
+                    OrganizationActivity.organization_id == organization.id,
+                    OrganizationActivity.activity_id
+                    != all_(literal([activity.id for activity in activities], ARRAY(Integer))),
                 )
+                .cte('unlinked'),
+                self._link(written, activities),
+            ]
+        organization = await self._write(written, *ctes, entity_id=organization.id)
+        if activities is not None:
+            set_committed_value(organization, 'activities', activities)
+        if building is not None:
+            set_committed_value(organization, 'building', building)
+        return organization
 
-        organization = Organization(
-            name=name, phones=phones, building=building, activities=activities
+    async def delete(self, organization: Organization):
+        unlinked = (
+            delete(OrganizationActivity)
+            .where(OrganizationActivity.organization_id == organization.id)
+            .cte('unlinked')
         )
-
-        self.session.add(organization)
-        await self.session.commit()
-        await self.session.refresh(
-            organization, attribute_names=['id', 'name', 'phones', 'building', 'activities']
+        await self._write(
+            self._written(delete(Organization).where(Organization.id == organization.id)),
+            unlinked,
+            entity_id=organization.id,
         )
-        return organization
+        self.session.expunge(organization)
 
-    async def update(self, organization: Organization, **kwargs) -> Organization:
-        if 'activity_ids' in kwargs and kwargs['activity_ids'] is not None:
-            activity_ids = kwargs.pop('activity_ids')
-            if activity_ids:
-                if len(activity_ids) != len(set(activity_ids)):
-                    raise HTTPException(
-                        status_code=400, detail='Обнаружены дубликаты id организаций'
-                    )
-                result = await self.session.execute(
-                    select(Activity).where(Activity.id.in_(activity_ids))
-                )
-                activities = list(result.scalars().all())
-                if len(activities) != len(activity_ids):
-                    raise HTTPException(
-                        status_code=400, detail='Один или более id организаций невалидны'
-                    )
-                organization.activities = activities
-            else:
-                organization.activities = []
-
-        for key, value in kwargs.items():
-            if value is not None:
-                setattr(organization, key, value)
-
-        await self.session.commit()
-        await self.session.refresh(
-            organization, attribute_names=['id', 'name', 'phones', 'building', 'activities']
+    async def search_by_name(
+        self,
+        name: str,
+        limit: int | None = None,
+        after: tuple[float, int] | None = None,
+        min_similarity: float | None = None,
+    ) -> List[dict]:
+        similarity = func.similarity(Organization.name, name)
+        stmt = self._documents(similarity.label('similarity'))
+        if min_similarity is None:
+            stmt = stmt.where(
+                Organization.name.ilike(f'%{_escape_like(name)}%', escape='/')
+                | Organization.name.op('%')(name)
+            )
+        else:
+            await self.read_session.execute(
+                select(func.set_config('pg_trgm.similarity_threshold', str(min_similarity), True))
+            )
+            stmt = stmt.where(Organization.name.op('%')(name), similarity >= min_similarity)
+        if after is not None:
+            stmt = stmt.where(
+                (similarity < after[0]) | ((similarity == after[0]) & (Organization.id > after[1]))
+            )
+        stmt = stmt.order_by(similarity.desc(), Organization.id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return await self._fetch_with(stmt, 'similarity')
+
+    async def suggest_by_prefix(self, prefix: str, limit: int) -> List[tuple[int, str]]:
+        prefix = prefix.lower()
+        # same expression as ix_organizations_name_prefix: the index scan is already ordered,
+        # so the LIMIT stops it early instead of sorting every match; the explicit range keeps
+        # the scan bounded under a generic plan, where LIKE on a parameter is not indexable
+        lower_name = func.lower(Organization.name).collate('C')
+        stmt = (
+            select(Organization.id, Organization.name)
+            .where(
+                lower_name >= prefix,
+                lower_name < prefix + MAX_CHAR,
+                lower_name.like(f'{_escape_like(prefix)}%', escape='/'),
+            )
+            .order_by(lower_name, Organization.id)
+            .limit(limit)
         )
-        return organization
+        result = await self.read_session.execute(stmt)
+        return result.all()
 
-    async def delete(self, organization: Organization):
-        await self.session.delete(organization)
-        await self.session.commit()
+    async def get_by_building(
+        self, building_id: int, limit: int | None = None, after_id: int | None = None
+    ) -> List[dict]:
+        stmt = self._documents().where(Organization.building_id == building_id)
+        return await self._fetch(self._keyset(stmt, limit, after_id))
 
-    async def search_by_name(self, name: str) -> List[Organization]:
-        stmt = self._with_relations(select(Organization)).where(
-            Organization.name.ilike(f'%{name}%')
+    async def get_by_buildings(
+        self, building_ids: list[int], limit: int | None = None, after_id: int | None = None
+    ) -> List[dict]:
+        stmt = self._documents().where(
+            Organization.building_id
+            == any_(bindparam('building_ids', building_ids, type_=ARRAY(Integer)))
         )
-        result = await self.session.execute(stmt)
-        return result.unique().scalars().all()
+        return await self._fetch(self._keyset(stmt, limit, after_id))
+
+    async def get_by_building_distances(
+        self,
+        distances: dict[int, float],
+        limit: int | None = None,
+        after: tuple[float, int] | None = None,
+    ) -> List[dict]:
+        hits = select(
+            func.unnest(
+                bindparam('building_ids', list(distances), type_=ARRAY(Integer))
+            ).label('building_id'),
+            func.unnest(
+                bindparam('distances', list(distances.values()), type_=ARRAY(Float))
+            ).label('distance_km'),
+        ).subquery('hits')
 
-    async def get_by_building(self, building_id: int) -> List[Organization]:
-        stmt = self._with_relations(select(Organization)).where(
-            Organization.building_id == building_id
+        stmt = self._documents(hits.c.distance_km).join(
+            hits, hits.c.building_id == Organization.building_id
         )
-        result = await self.session.execute(stmt)
-        return result.unique().scalars().all()
+        if after is not None:
+            stmt = stmt.where(tuple_(hits.c.distance_km, Organization.id) > tuple_(*after))
+        stmt = stmt.order_by(hits.c.distance_km, Organization.id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return await self._fetch_with(stmt, 'distance_km')
 
-    async def get_by_activity(self, activity_ids: list[int]) -> List[Organization]:
-        stmt = (
-            self._with_relations(select(Organization))
-            .join(Organization.activities)
-            .where(Activity.id.in_(activity_ids))
+    async def get_by_activity(
+        self, activity_id: int, limit: int | None = None, after_id: int | None = None
+    ) -> List[dict]:
+        stmt = self._documents().where(Organization.id.in_(self._activity_subtree(activity_id)))
+        return await self._fetch(self._keyset(stmt, limit, after_id))
+
+    async def get_in_radius(
+        self,
+        lat: float,
+        lon: float,
+        radius_km: float,
+        limit: int | None = None,
+        after: tuple[float, int] | None = None,
+    ) -> List[dict]:
+        center, point, distance_km = self._earth_distance_km(lat, lon)
+
+        stmt = self._documents(distance_km.label('distance_km')).where(
+            func.earth_box(center, radius_km * 1000.0).op('@>')(point),
+            distance_km <= radius_km,
         )
-        result = await self.session.execute(stmt)
-        return result.unique().scalars().all()
+        if after is not None:
+            stmt = stmt.where(tuple_(distance_km, Organization.id) > tuple_(*after))
+        stmt = stmt.order_by(distance_km, Organization.id)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return await self._fetch_with(stmt, 'distance_km')
 
-    async def get_in_radius(self, lat: float, lon: float, radius_km: float) -> List[Organization]:
-        lat_delta = radius_km / 111.0
-        cos_lat = math.cos(math.radians(lat))
-        if abs(cos_lat) < 1e-6:
-            lon_delta = radius_km / 111.0
-        else:
-            lon_delta = radius_km / (111.0 * cos_lat)
+    async def get_nearest(
+        self,
+        lat: float,
+        lon: float,
+        limit: int,
+        activity_id: int | None = None,
+        max_distance_km: float | None = None,
+    ) -> List[dict]:
+        center, point, distance_km = self._earth_distance_km(lat, lon)
 
-        stmt = (
-            self._with_relations(select(Organization))
-            .join(Organization.building)
-            .where(
-                Building.latitude.between(lat - lat_delta, lat + lat_delta)
-                & Building.longitude.between(lon - lon_delta, lon + lon_delta)
+        # The k nearest are picked by a plain inner join ordered by cube's <->, which the GiST
+        # index on buildings answers as a KNN scan; the documents are built for those k only.
+        nearest = (
+            select(Organization.id.label('id'), distance_km.label('distance_km'))
+            .select_from(Organization)
+            .join(Building, Building.id == Organization.building_id)
+        )
+        if activity_id is not None:
+            nearest = nearest.where(Organization.id.in_(self._activity_subtree(activity_id)))
+        if max_distance_km is not None:
+            nearest = nearest.where(
+                func.earth_box(center, max_distance_km * 1000.0).op('@>')(point),
+                distance_km <= max_distance_km,
             )
+        nearest = (
+            nearest.order_by(point.op('<->')(center), Organization.id)
+            .limit(limit)
+            .subquery('nearest')
         )
-        result = await self.session.execute(stmt)
-        return result.unique().scalars().all()
 
-    async def get_in_rect(
-        self, min_lat: float, max_lat: float, min_lon: float, max_lon: float
-    ) -> List[Organization]:
         stmt = (
-            self._with_relations(select(Organization))
-            .join(Organization.building)
-            .where(
-                Building.latitude.between(min_lat, max_lat)
-                & Building.longitude.between(min_lon, max_lon)
-            )
+            self._documents(nearest.c.distance_km)
+            .join(nearest, nearest.c.id == Organization.id)
+            .order_by(nearest.c.distance_km, Organization.id)
         )
-        result = await self.session.execute(stmt)
-        return result.unique().scalars().all()
+        return await self._fetch_with(stmt, 'distance_km')
+
+    async def get_in_rect(
+        self,
+        min_lat: float,
+        max_lat: float,
+        min_lon: float,
+        max_lon: float,
+        limit: int | None = None,
+        after_id: int | None = None,
+    ) -> List[dict]:
+        stmt = self._documents().where(
+            Building.latitude.between(min_lat, max_lat)
+            & Building.longitude.between(min_lon, max_lon)
+        )
+        return await self._fetch(self._keyset(stmt, limit, after_id))
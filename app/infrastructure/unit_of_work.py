@@ -0,0 +1,16 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.abc_repositories import AbstractUnitOfWork
+from app.infrastructure.replicas import CURRENT_LSN, consistency
+
+
+class SqlAlchemyUnitOfWork(AbstractUnitOfWork):
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def commit(self) -> None:
+        await self.session.commit()
+        state = consistency.get()
+        if state is not None:
+            # read after the commit, so the position covers its commit record
+            state.commit_lsn = await self.session.scalar(CURRENT_LSN)
@@ -1,22 +1,43 @@
+import logging
 from contextlib import asynccontextmanager
 
 import uvicorn
 from dishka.integrations.fastapi import setup_dishka
-from fastapi import FastAPI, Security
+from fastapi import FastAPI, Request, Security
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from fastapi.responses import JSONResponse
 
+from app.adapters.metrics import http_metrics
+from app.adapters.middleware import ConsistencyMiddleware, InstrumentationMiddleware
+from app.adapters.profiling import ProfilingMiddleware
+from app.adapters.routers import metrics
 from app.adapters.routers.dependencies.dependencies import get_api_key
 from app.adapters.routers.router import router
+from app.domain.abc_repositories import EntityNotFound
+from app.domain.building_index import BuildingIndex
+from app.infrastructure.database import AsyncSessionLocal, read_only_engine
 from app.infrastructure.di import create_container
+from app.infrastructure.invalidation import InvalidationListener
+from app.infrastructure.replicas import ReplicaSet
+from app.infrastructure.repositories.building import BuildingRepository
 from app.settings import settings
 
+logging.basicConfig(level=settings.LOG_LEVEL, format='%(levelname)s %(name)s %(message)s')
+
+container = create_container()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global container
-    container = create_container()
-    setup_dishka(container=container, app=app)
+    if settings.INVALIDATION_ENABLED:
+        await container.get(InvalidationListener)
+    await container.get(ReplicaSet)
+    if settings.BUILDING_INDEX_ENABLED:
+        # loaded after the listener starts, so no change between the two is missed
+        async with AsyncSessionLocal(bind=read_only_engine) as session:
+            building_index = await container.get(BuildingIndex)
+            await building_index.refresh(BuildingRepository(session))
     yield
     await container.close()
 
@@ -26,6 +47,7 @@ app = FastAPI(
     summary='Тестовое задание для компании Secunda.\nСправочник организаций с авторизацией по ключу в хэдере',
     docs_url=None,
     redoc_url=None,
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -35,11 +57,36 @@ app.add_middleware(
     allow_methods=['*'],
     allow_headers=['*'],
 )
+app.add_middleware(
+    InstrumentationMiddleware,
+    metrics=http_metrics if settings.METRICS_ENABLED else None,
+    access_log=settings.ACCESS_LOG,
+)
+if settings.POSTGRES_REPLICA_HOSTS:
+    # without replicas every read already sees the primary, so no token is issued
+    app.add_middleware(ConsistencyMiddleware, cookie_max_age=settings.READ_YOUR_WRITES_WINDOW)
+if settings.PROFILING_ENABLED:
+    # not installed at all unless enabled, so it costs nothing in normal operation
+    app.add_middleware(
+        ProfilingMiddleware,
+        admin_key=settings.PROFILING_ADMIN_KEY,
+        directory=settings.PROFILING_DIR,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        sample_format=settings.PROFILING_SAMPLE_FORMAT,
+        interval=settings.PROFILING_INTERVAL,
+    )
 
-container = create_container()
 setup_dishka(container=container, app=app)
 
 app.include_router(router, dependencies=[Security(get_api_key)])
+if settings.METRICS_ENABLED:
+    # scraped by Prometheus, deliberately outside the key-protected /secunda router
+    app.include_router(metrics.router)
+
+
+@app.exception_handler(EntityNotFound)
+async def entity_not_found(request: Request, error: EntityNotFound) -> JSONResponse:
+    return JSONResponse({'detail': str(error)}, status_code=404)
 
 
 @app.get('/docs', include_in_schema=False)
@@ -1,14 +1,26 @@
+from operator import attrgetter
 from typing import List
 
 from fastapi import HTTPException
 
-from app.domain.abc_repositories import AbstractActivityRepository
+from app.domain.abc_repositories import AbstractActivityRepository, AbstractUnitOfWork
+from app.domain.activity_tree import ActivityTree
 from app.domain.entities import Activity
+from app.services.batch import Batch, collect
 
 
 class ActivityService:
-    def __init__(self, activity_repo: AbstractActivityRepository):
+    def __init__(
+        self,
+        activity_repo: AbstractActivityRepository,
+        uow: AbstractUnitOfWork,
+        activity_tree: ActivityTree,
+        max_depth: int = 3,
+    ):
         self.activity_repo = activity_repo
+        self.uow = uow
+        self.activity_tree = activity_tree
+        self.max_depth = max_depth
 
     async def get_all(self) -> List[Activity]:
         return await self.activity_repo.get_all()
@@ -16,41 +28,66 @@ class ActivityService:
     async def get_by_id(self, activity_id: int) -> Activity | None:
         return await self.activity_repo.get_by_id(activity_id)
 
+    async def get_by_ids(self, activity_ids: list[int]) -> Batch[Activity]:
+        activities = await self.activity_repo.get_by_ids(activity_ids)
+        return collect(activity_ids, activities, attrgetter('id'))
+
+    async def _get_tree(self, *activity_ids: int) -> ActivityTree:
+        await self.activity_tree.ensure_loaded(self.activity_repo)
+        if any(activity_id not in self.activity_tree for activity_id in activity_ids):
+            await self.activity_tree.refresh(self.activity_repo)
+        return self.activity_tree
+
     async def create(self, name: str, parent_id: int = None) -> Activity:
         if parent_id is not None:
-            parent = await self.activity_repo.get_by_id(parent_id)
-            if not parent:
+            tree = await self._get_tree(parent_id)
+            if parent_id not in tree:
                 raise HTTPException(
                     status_code=400, detail='Родительский вид деятельности не обнаружен'
                 )
-            if await self.activity_repo.get_depth(parent.id) >= 2:
+            if tree.depth(parent_id) >= self.max_depth - 1:
                 raise HTTPException(
-                    status_code=400, detail='Превышен лимит вложенности. Максимальный уровень - 3'
+                    status_code=400,
+                    detail=f'Превышен лимит вложенности. Максимальный уровень - {self.max_depth}',
                 )
-        return await self.activity_repo.create(name=name, parent_id=parent_id)
+        activity = await self.activity_repo.create(name=name, parent_id=parent_id)
+        await self.uow.commit()
+        self.activity_tree.upsert(activity.id, activity.parent_id)
+        return activity
 
     async def update(
         self, activity: Activity, name: str = None, parent_id: int = None
     ) -> Activity:
         if parent_id is not None:
-            parent = await self.activity_repo.get_by_id(parent_id)
             if activity.id == parent_id:
                 raise HTTPException(status_code=400, detail='Запись не может зависеть от себя')
-            if not parent:
+            tree = await self._get_tree(parent_id, activity.id)
+            if parent_id not in tree:
                 raise HTTPException(
                     status_code=400, detail='Указанный родительский элемент не существует'
                 )
-            if await self.activity_repo.get_depth(parent.id) >= 2:
+            if parent_id in tree.descendants(activity.id):
+                raise HTTPException(
+                    status_code=400, detail='Запись не может зависеть от своей поддеятельности'
+                )
+            # the whole subtree moves along, so its deepest level must still fit
+            if tree.depth(parent_id) + 1 + tree.height(activity.id) >= self.max_depth:
                 raise HTTPException(
-                    status_code=400, detail='Превышен лимит вложенности. Максимальный уровень - 3'
+                    status_code=400,
+                    detail=f'Превышен лимит вложенности. Максимальный уровень - {self.max_depth}',
                 )
-        return await self.activity_repo.update(activity, name=name, parent_id=parent_id)
+        activity = await self.activity_repo.update(activity, name=name, parent_id=parent_id)
+        await self.uow.commit()
+        self.activity_tree.upsert(activity.id, activity.parent_id)
+        return activity
 
     async def delete(self, activity_id: int) -> None:
         activity = await self.get_by_id(activity_id)
         if not activity:
             raise ValueError(f'Не обнаружена активность с id {activity_id}')
         await self.activity_repo.delete(activity)
+        await self.uow.commit()
+        self.activity_tree.remove(activity_id)
 
     async def get_sub_activities(self, activity_id: int) -> List[Activity]:
-        return await self.activity_repo.get_sub_activities(activity_id)
+        return await self.activity_repo.get_sub_activities(activity_id, self.max_depth)
@@ -0,0 +1,29 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Generic, List, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar('T')
+
+
+@dataclass
+class Batch(Generic[T]):
+    items: List[T]
+    missing: List[int] = field(default_factory=list)
+
+
+def unique_ids(ids: List[int], max_size: int) -> List[int]:
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise HTTPException(status_code=400, detail='Не указан ни один id')
+    if len(ids) > max_size:
+        raise HTTPException(status_code=400, detail=f'Можно запросить не более {max_size} id')
+    return ids
+
+
+def collect(ids: List[int], found: List[T], key: Callable[[T], Any]) -> Batch[T]:
+    by_id = {key(item): item for item in found}
+    return Batch(
+        items=[by_id[entity_id] for entity_id in ids if entity_id in by_id],
+        missing=[entity_id for entity_id in ids if entity_id not in by_id],
+    )
@@ -1,14 +1,24 @@
+from operator import attrgetter
 from typing import List
 
 from fastapi import HTTPException
 
-from app.domain.abc_repositories import AbstractBuildingRepository
+from app.domain.abc_repositories import AbstractBuildingRepository, AbstractUnitOfWork
+from app.domain.building_index import BuildingIndex
 from app.domain.entities import Building
+from app.services.batch import Batch, collect
 
 
 class BuildingService:
-    def __init__(self, building_repo: AbstractBuildingRepository):
+    def __init__(
+        self,
+        building_repo: AbstractBuildingRepository,
+        uow: AbstractUnitOfWork,
+        building_index: BuildingIndex,
+    ):
         self.building_repo = building_repo
+        self.uow = uow
+        self.building_index = building_index
 
     async def get_all(self) -> List[Building]:
         return await self.building_repo.get_all()
@@ -16,10 +26,17 @@ class BuildingService:
     async def get_by_id(self, building_id: int) -> Building | None:
         return await self.building_repo.get_by_id(building_id)
 
+    async def get_by_ids(self, building_ids: list[int]) -> Batch[Building]:
+        buildings = await self.building_repo.get_by_ids(building_ids)
+        return collect(building_ids, buildings, attrgetter('id'))
+
     async def create(self, address: str, latitude: float, longitude: float) -> Building:
-        return await self.building_repo.create(
+        building = await self.building_repo.create(
             address=address, latitude=latitude, longitude=longitude
         )
+        await self.uow.commit()
+        self.building_index.upsert(building.id, building.latitude, building.longitude)
+        return building
 
     async def update(
         self,
@@ -28,12 +45,17 @@ class BuildingService:
         latitude: float = None,
         longitude: float = None,
     ) -> Building:
-        return await self.building_repo.update(
+        building = await self.building_repo.update(
             building, address=address, latitude=latitude, longitude=longitude
         )
+        await self.uow.commit()
+        self.building_index.upsert(building.id, building.latitude, building.longitude)
+        return building
 
     async def delete(self, building_id: int) -> None:
         building = await self.get_by_id(building_id)
         if not building:
             raise HTTPException(status_code=400, detail=f'Здание с id {building_id} не найдено')
         await self.building_repo.delete(building)
+        await self.uow.commit()
+        self.building_index.remove(building_id)
@@ -0,0 +1,59 @@
+from dataclasses import dataclass, field
+from typing import AsyncIterable, List
+
+from app.domain.abc_repositories import AbstractImportRepository, AbstractUnitOfWork
+from app.domain.activity_tree import ActivityTree
+from app.domain.building_index import BuildingIndex
+from app.domain.table_versions import TableVersions
+
+
+@dataclass
+class ImportResult:
+    imported: int
+    errors: List[tuple[int, str]] = field(default_factory=list)
+    # rows that matched an existing building and overwrote its coordinates
+    updated: int = 0
+
+
+class BulkImportService:
+    def __init__(
+        self,
+        import_repo: AbstractImportRepository,
+        uow: AbstractUnitOfWork,
+        activity_tree: ActivityTree,
+        building_index: BuildingIndex,
+        table_versions: TableVersions,
+        max_depth: int = 3,
+        batch_size: int = 5000,
+    ):
+        self.import_repo = import_repo
+        self.uow = uow
+        self.activity_tree = activity_tree
+        self.building_index = building_index
+        self.table_versions = table_versions
+        self.max_depth = max_depth
+        self.batch_size = batch_size
+
+    async def import_buildings(self, rows: AsyncIterable[tuple[int, dict]]) -> ImportResult:
+        imported, updated, errors = await self.import_repo.import_buildings(
+            rows, self.batch_size
+        )
+        await self.uow.commit()
+        self.building_index.invalidate()
+        self.table_versions.invalidate()
+        return ImportResult(imported, errors, updated)
+
+    async def import_activities(self, rows: AsyncIterable[tuple[int, dict]]) -> ImportResult:
+        imported, errors = await self.import_repo.import_activities(
+            rows, self.max_depth, self.batch_size
+        )
+        await self.uow.commit()
+        self.activity_tree.invalidate()
+        self.table_versions.invalidate()
+        return ImportResult(imported, errors)
+
+    async def import_organizations(self, rows: AsyncIterable[tuple[int, dict]]) -> ImportResult:
+        imported, errors = await self.import_repo.import_organizations(rows, self.batch_size)
+        await self.uow.commit()
+        self.table_versions.invalidate()
+        return ImportResult(imported, errors)
@@ -1,64 +1,270 @@
-from typing import List
+from operator import itemgetter
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, List
 
 from fastapi import HTTPException
 
 from app.domain.abc_repositories import (
-    AbstractActivityRepository,
     AbstractBuildingRepository,
     AbstractOrganizationRepository,
+    AbstractUnitOfWork,
 )
-from app.domain.entities import Organization
+from app.domain.building_index import BuildingIndex
+from app.domain.entities import Activity, Building, Organization
+from app.domain.single_flight import SingleFlight
+from app.services.batch import Batch, collect
+from app.services.pagination import Page, decode_cursor, decode_id_cursor, paginate
+
+
+def _by_id(organization: dict) -> tuple:
+    return (organization['id'],)
+
+
+def _by_distance(organization: dict) -> tuple:
+    return organization['distance_km'], organization['id']
+
+
+def _by_similarity(organization: dict) -> tuple:
+    return organization['similarity'], organization['id']
 
 
 class OrganizationService:
     def __init__(
         self,
         org_repo: AbstractOrganizationRepository,
-        activity_repo: AbstractActivityRepository,
         building_repo: AbstractBuildingRepository,
+        uow: AbstractUnitOfWork,
+        building_index: BuildingIndex | None = None,
+        single_flight: SingleFlight | None = None,
     ):
         self.org_repo = org_repo
-        self.activity_repo = activity_repo
         self.building_repo = building_repo
+        self.uow = uow
+        self.building_index = building_index
+        self.single_flight = single_flight
+
+    async def _coalesce(self, call: Callable[[], Awaitable[Any]], *key: Hashable) -> Any:
+        # identical concurrent reads share one query; results are only read by serializers
+        if self.single_flight is None:
+            return await call()
+        return await self.single_flight.run(key, call)
+
+    async def _get_building_index(self) -> BuildingIndex:
+        await self.building_index.ensure_loaded(self.building_repo)
+        return self.building_index
+
+    async def get_all(self, limit: int, cursor: str | None = None) -> Page[dict]:
+        after_id = decode_id_cursor(cursor)
+        return await self._coalesce(
+            lambda: self._get_all(limit, after_id), 'get_all', limit, after_id
+        )
 
-    async def get_all(self) -> List[Organization]:
-        return await self.org_repo.get_all()
+    async def _get_all(self, limit: int, after_id: int | None) -> Page[dict]:
+        organizations = await self.org_repo.get_all(limit + 1, after_id)
+        return paginate(organizations, limit, _by_id)
 
     async def get_by_id(self, org_id: int) -> Organization | None:
         return await self.org_repo.get_by_id(org_id)
 
-    async def get_by_building(self, building_id: int) -> List[Organization]:
-        return await self.org_repo.get_by_building(building_id)
+    async def get_document(self, org_id: int) -> dict | None:
+        return await self.org_repo.get_document(org_id)
+
+    async def get_documents(self, org_ids: list[int]) -> Batch[dict]:
+        documents = await self.org_repo.get_documents(org_ids)
+        return collect(org_ids, documents, itemgetter('id'))
+
+    async def get_by_building(
+        self, building_id: int, limit: int, cursor: str | None = None
+    ) -> Page[dict]:
+        after_id = decode_id_cursor(cursor)
+        return await self._coalesce(
+            lambda: self._get_by_building(building_id, limit, after_id),
+            'get_by_building',
+            building_id,
+            limit,
+            after_id,
+        )
+
+    async def _get_by_building(
+        self, building_id: int, limit: int, after_id: int | None
+    ) -> Page[dict]:
+        organizations = await self.org_repo.get_by_building(building_id, limit + 1, after_id)
+        return paginate(organizations, limit, _by_id)
 
-    async def get_by_activity(self, activity_id: int) -> List[Organization]:
-        sub_activities = await self.activity_repo.get_sub_activities(activity_id)
-        result = await self.org_repo.get_by_activity(
-            [sub_activity.id for sub_activity in sub_activities]
+    async def get_by_activity(
+        self, activity_id: int, limit: int, cursor: str | None = None
+    ) -> Page[dict]:
+        after_id = decode_id_cursor(cursor)
+        return await self._coalesce(
+            lambda: self._get_by_activity(activity_id, limit, after_id),
+            'get_by_activity',
+            activity_id,
+            limit,
+            after_id,
         )
-        return result
 
-    async def get_in_radius(self, lat: float, lon: float, radius_km: float) -> List[Organization]:
-        return await self.org_repo.get_in_radius(lat, lon, radius_km)
+    async def _get_by_activity(
+        self, activity_id: int, limit: int, after_id: int | None
+    ) -> Page[dict]:
+        organizations = await self.org_repo.get_by_activity(activity_id, limit + 1, after_id)
+        return paginate(organizations, limit, _by_id)
+
+    async def get_in_radius(
+        self, lat: float, lon: float, radius_km: float, limit: int, cursor: str | None = None
+    ) -> Page[dict]:
+        after = decode_cursor(cursor, float, int)
+        return await self._coalesce(
+            lambda: self._get_in_radius(lat, lon, radius_km, limit, after),
+            'get_in_radius',
+            float(lat),
+            float(lon),
+            float(radius_km),
+            limit,
+            after,
+        )
+
+    async def _get_in_radius(
+        self, lat: float, lon: float, radius_km: float, limit: int, after: tuple | None
+    ) -> Page[dict]:
+        if self.building_index is None:
+            organizations = await self.org_repo.get_in_radius(
+                lat, lon, radius_km, limit + 1, after
+            )
+            return paginate(organizations, limit, _by_distance)
+
+        index = await self._get_building_index()
+        hits = index.within_radius(lat, lon, radius_km)
+        if after is not None:
+            hits = [hit for hit in hits if hit[1] >= after[0]]
+        if not hits:
+            return Page(items=[])
+        organizations = await self.org_repo.get_by_building_distances(dict(hits), limit + 1, after)
+        return paginate(organizations, limit, _by_distance)
+
+    async def get_nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int,
+        activity_id: int | None = None,
+        max_distance_km: float | None = None,
+    ) -> List[dict]:
+        return await self._coalesce(
+            lambda: self.org_repo.get_nearest(lat, lon, k, activity_id, max_distance_km),
+            'get_nearest',
+            float(lat),
+            float(lon),
+            k,
+            activity_id,
+            max_distance_km,
+        )
 
     async def get_in_rect(
-        self, min_lat: float, max_lat: float, min_lon: float, max_lon: float
-    ) -> List[Organization]:
-        return await self.org_repo.get_in_rect(min_lat, max_lat, min_lon, max_lon)
+        self,
+        min_lat: float,
+        max_lat: float,
+        min_lon: float,
+        max_lon: float,
+        limit: int,
+        cursor: str | None = None,
+    ) -> Page[dict]:
+        after_id = decode_id_cursor(cursor)
+        return await self._coalesce(
+            lambda: self._get_in_rect(min_lat, max_lat, min_lon, max_lon, limit, after_id),
+            'get_in_rect',
+            float(min_lat),
+            float(max_lat),
+            float(min_lon),
+            float(max_lon),
+            limit,
+            after_id,
+        )
 
-    async def search_by_name(self, name: str) -> List[Organization]:
-        return await self.org_repo.search_by_name(name)
+    async def _get_in_rect(
+        self,
+        min_lat: float,
+        max_lat: float,
+        min_lon: float,
+        max_lon: float,
+        limit: int,
+        after_id: int | None,
+    ) -> Page[dict]:
+        if self.building_index is None:
+            organizations = await self.org_repo.get_in_rect(
+                min_lat, max_lat, min_lon, max_lon, limit + 1, after_id
+            )
+            return paginate(organizations, limit, _by_id)
+
+        index = await self._get_building_index()
+        building_ids = index.within_rect(min_lat, max_lat, min_lon, max_lon)
+        if not building_ids:
+            return Page(items=[])
+        organizations = await self.org_repo.get_by_buildings(building_ids, limit + 1, after_id)
+        return paginate(organizations, limit, _by_id)
+
+    async def search_by_name(
+        self,
+        name: str,
+        limit: int,
+        cursor: str | None = None,
+        min_similarity: float | None = None,
+    ) -> Page[dict]:
+        after = decode_cursor(cursor, float, int)
+        return await self._coalesce(
+            lambda: self._search_by_name(name, limit, after, min_similarity),
+            'search_by_name',
+            name.lower(),
+            limit,
+            after,
+            min_similarity,
+        )
+
+    async def _search_by_name(
+        self, name: str, limit: int, after: tuple | None, min_similarity: float | None
+    ) -> Page[dict]:
+        organizations = await self.org_repo.search_by_name(name, limit + 1, after, min_similarity)
+        return paginate(organizations, limit, _by_similarity)
+
+    async def suggest(self, prefix: str, limit: int) -> List[tuple[int, str]]:
+        return await self._coalesce(
+            lambda: self.org_repo.suggest_by_prefix(prefix, limit),
+            'suggest',
+            prefix.lower(),
+            limit,
+        )
+
+    def export(self, batch_size: int) -> AsyncIterator[List[dict]]:
+        return self.org_repo.stream_all(batch_size)
+
+    async def _load_references(
+        self, building_id: int | None, activity_ids: list[int] | None
+    ) -> tuple[Building | None, list[Activity] | None]:
+        if building_id is None and activity_ids is None:
+            return None, None
+        if activity_ids is not None and len(activity_ids) != len(set(activity_ids)):
+            raise HTTPException(status_code=400, detail='Обнаружены дубликаты id организаций')
+        building, activities, missing = await self.org_repo.load_references(
+            building_id, activity_ids or []
+        )
+        if building_id is not None and building is None:
+            raise HTTPException(status_code=400, detail=f'Здание с id {building_id} не найдено')
+        if missing:
+            raise HTTPException(
+                status_code=400,
+                detail=f'Не обнаружены активности с id {", ".join(map(str, missing))}',
+            )
+        return building, None if activity_ids is None else activities
 
     async def create(
-        self, name: str, phones: list[str], building_id: int, activity_ids: list[int]
+        self, name: str, phones: list[str], building_id: int | None, activity_ids: list[int]
     ) -> Organization:
-        if not await self.building_repo.get_by_id(building_id):
+        building, activities = await self._load_references(building_id, activity_ids)
+        if building is None:
             raise HTTPException(status_code=400, detail=f'Здание с id {building_id} не найдено')
-        for aid in activity_ids:
-            if not await self.activity_repo.get_by_id(aid):
-                raise ValueError(f'Activity {aid} not found')
-        return await self.org_repo.create(
-            name=name, phones=phones, building_id=building_id, activity_ids=activity_ids
+        organization = await self.org_repo.create(
+            name=name, phones=phones, building=building, activities=activities
         )
+        await self.uow.commit()
+        return organization
 
     async def update(
         self,
@@ -68,18 +274,13 @@ class OrganizationService:
         building_id: int = None,
         activity_ids: list[int] = None,
     ) -> Organization:
-        if building_id is not None:
-            if not await self.building_repo.get_by_id(building_id):
-                raise HTTPException(
-                    status_code=400, detail=f'Здание с id {building_id} не найдено'
-                )
-        if activity_ids is not None:
-            for aid in activity_ids:
-                if not await self.activity_repo.get_by_id(aid):
-                    raise ValueError(f'Не обнаружена активность с id {aid}')
-        return await self.org_repo.update(
-            org, name=name, phones=phones, building_id=building_id, activity_ids=activity_ids
+        building, activities = await self._load_references(building_id, activity_ids)
+        org = await self.org_repo.update(
+            org, name=name, phones=phones, building=building, activities=activities
         )
+        await self.uow.commit()
+        return org
 
     async def delete(self, org: Organization) -> None:
         await self.org_repo.delete(org)
+        await self.uow.commit()
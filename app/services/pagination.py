@@ -0,0 +1,44 @@
+import base64
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, List, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar('T')
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T]
+    next_cursor: str | None = None
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: str | None, *types: type) -> tuple | None:
+    if cursor is None:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode() + b'=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError(cursor)
+        return tuple(type_(value) for type_, value in zip(types, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail='Некорректный курсор')
+
+
+def decode_id_cursor(cursor: str | None) -> int | None:
+    after = decode_cursor(cursor, int)
+    return after[0] if after is not None else None
+
+
+def paginate(items: List[T], limit: int, key: Callable[[T], tuple]) -> Page[T]:
+    if len(items) <= limit:
+        return Page(items=list(items))
+    items = list(items[:limit])
+    return Page(items=items, next_cursor=encode_cursor(*key(items[-1])))
@@ -1,3 +1,4 @@
+from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from app.definitions import ENV_FILE
@@ -6,16 +7,80 @@ from app.definitions import ENV_FILE
 class Settings(BaseSettings):
     APP_HOST: str = '0.0.0.0'
     API_KEY: str = 'key'
+    DEBUG: bool = False
     ECHO: bool = False
+    LOG_LEVEL: str = 'INFO'
+    ACCESS_LOG: bool = True
+    METRICS_ENABLED: bool = True
+    PROFILING_ENABLED: bool = False
+    PROFILING_ADMIN_KEY: str = ''
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_SAMPLE_FORMAT: str = 'collapsed'
+    PROFILING_INTERVAL: float = 0.001
+    PROFILING_DIR: str = 'profiles'
+    SLOW_QUERY_THRESHOLD: float = 0.5
+    N_PLUS_ONE_THRESHOLD: int = 5
     POSTGRES_USER: str = 'user'
     POSTGRES_PASSWORD: str = 'password'
     POSTGRES_DB: str = 'org_db'
     POSTGRES_HOST: str = 'db'
+    ACTIVITY_MAX_DEPTH: int = 3
+    BUILDING_INDEX_ENABLED: bool = True
+    EXPORT_BATCH_SIZE: int = 1000
+    BATCH_MAX_IDS: int = 1000
+    FAST_SERIALIZATION: bool = True
+    ENTITY_CACHE_ENABLED: bool = True
+    ENTITY_CACHE_SIZE: int = 10000
+    ENTITY_CACHE_TTL: float = 60.0
+    INVALIDATION_ENABLED: bool = True
+    INVALIDATION_KEEPALIVE: float = 30.0
+    TABLE_VERSIONS_MAX_AGE: float = 5.0
+    SINGLE_FLIGHT_ENABLED: bool = True
+    SINGLE_FLIGHT_WINDOW: float = 0.0
+    SINGLE_FLIGHT_MAX_ENTRIES: int = 1000
+    CACHE_CONTROL_ORGANIZATIONS: str = 'private, no-cache'
+    CACHE_CONTROL_BUILDINGS: str = 'private, no-cache'
+    CACHE_CONTROL_ACTIVITIES: str = 'private, no-cache'
+    IMPORT_BATCH_SIZE: int = 5000
+    IMPORT_MAX_BYTES: int = 100 * 1024 * 1024
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_TRANSACTION_POOLER: bool = False
+    POSTGRES_REPLICA_HOSTS: list[str] = []
+    REPLICA_MAX_LAG: float = 5.0
+    REPLICA_LAG_CHECK_INTERVAL: float = 1.0
+    READ_YOUR_WRITES_WINDOW: float = 5.0
+    BULKHEAD_ENABLED: bool = True
+    BULKHEAD_SCAN_LIMIT: int = 4
+    BULKHEAD_SCAN_QUEUE: int = 16
+    BULKHEAD_LOOKUP_LIMIT: int = 64
+    BULKHEAD_LOOKUP_QUEUE: int = 256
+    BULKHEAD_WRITE_LIMIT: int = 8
+    BULKHEAD_WRITE_QUEUE: int = 32
+    BULKHEAD_IMPORT_LIMIT: int = 1
+    BULKHEAD_IMPORT_QUEUE: int = 0
+    BULKHEAD_QUEUE_TIMEOUT: float = 1.0
+    BULKHEAD_RETRY_AFTER: float = 1.0
+    RATE_LIMIT_ENABLED: bool = False
+    # tokens per second; zero would leave a drained bucket with no time to refill
+    RATE_LIMIT_RATE: float = Field(50.0, gt=0)
+    RATE_LIMIT_BURST: float = 100.0
 
     @property
     def DATABASE_URL(self) -> str:
         return f'postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:5432/{self.POSTGRES_DB}'
 
+    @property
+    def REPLICA_DATABASE_URLS(self) -> list[str]:
+        return [
+            f'postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{host}{"" if ":" in host else ":5432"}/{self.POSTGRES_DB}'
+            for host in self.POSTGRES_REPLICA_HOSTS
+        ]
+
     model_config = SettingsConfigDict(env_file=ENV_FILE, env_file_encoding='utf-8', extra='allow')
 
 
@@ -0,0 +1,515 @@
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, List
+from urllib.parse import urlencode
+
+import httpx
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.routing import APIRoute
+
+from app.adapters.routers.router import router
+from app.settings import settings
+
+METHOD_ORDER = {'GET': 0, 'POST': 1, 'PUT': 2, 'DELETE': 3}
+
+
+@dataclass
+class Dataset:
+    buildings: List[dict]
+    activities: List[dict]
+    organizations: List[dict]
+    run: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    created: dict[str, List[int]] = field(default_factory=dict)
+    counter: int = 0
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f'{prefix} {self.run}-{self.counter}'
+
+    def organization_body(self, rng: random.Random) -> dict:
+        return {
+            'name': self.unique('ООО «Бенчмарк»'),
+            'phones': [f'+79{rng.randrange(10 ** 9):09d}'],
+            'building_id': rng.choice(self.buildings)['id'],
+            'activity_ids': [activity['id'] for activity in rng.sample(self.activities, 2)],
+        }
+
+
+@dataclass
+class Call:
+    params: dict = field(default_factory=dict)
+    query: dict = field(default_factory=dict)
+    body: bytes = b''
+    content_type: str | None = None
+
+
+def _json(payload) -> dict:
+    return {'body': json.dumps(payload).encode(), 'content_type': 'application/json'}
+
+
+def _ndjson(rows: List[dict]) -> dict:
+    body = ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+    return {'body': body.encode(), 'content_type': 'application/x-ndjson'}
+
+
+def _remember(entity: str):
+    def record(data: Dataset, content: bytes) -> None:
+        data.created.setdefault(entity, []).append(json.loads(content)['id'])
+
+    return record
+
+
+def _update(entity: str, param: str, payload: Callable[[Dataset, random.Random], dict]):
+    def build(data: Dataset, rng: random.Random) -> Call | None:
+        ids = data.created.get(entity)
+        if not ids:
+            return None
+        return Call(params={param: rng.choice(ids)}, **_json(payload(data, rng)))
+
+    return build
+
+
+def _delete(entity: str, param: str):
+    def build(data: Dataset, rng: random.Random) -> Call | None:
+        ids = data.created.get(entity)
+        if not ids:
+            return None
+        return Call(params={param: ids.pop()})
+
+    return build
+
+
+def _point(data: Dataset, rng: random.Random) -> tuple[float, float]:
+    building = rng.choice(data.buildings)
+    return building['latitude'], building['longitude']
+
+
+def _radius(data: Dataset, rng: random.Random) -> Call:
+    lat, lon = _point(data, rng)
+    return Call(query={'lat': lat, 'lon': lon, 'radius_km': rng.choice([0.5, 1, 2, 5])})
+
+
+def _nearest(data: Dataset, rng: random.Random) -> Call:
+    lat, lon = _point(data, rng)
+    return Call(query={'lat': lat, 'lon': lon, 'k': 10})
+
+
+def _rectangle(data: Dataset, rng: random.Random) -> Call:
+    lat, lon = _point(data, rng)
+    size = rng.choice([0.005, 0.01, 0.02])
+    return Call(
+        query={
+            'min_lat': lat - size,
+            'max_lat': lat + size,
+            'min_lon': lon - size,
+            'max_lon': lon + size,
+        }
+    )
+
+
+def _ids(entities: List[dict], rng: random.Random, size: int = 50) -> List[int]:
+    return [entity['id'] for entity in rng.sample(entities, min(size, len(entities)))]
+
+
+def _batch(entity: str) -> Callable[[Dataset, random.Random], Call]:
+    return lambda data, rng: Call(
+        query={'ids': ','.join(map(str, _ids(getattr(data, entity), rng)))}
+    )
+
+
+def _batch_body(entity: str) -> Callable[[Dataset, random.Random], Call]:
+    return lambda data, rng: Call(**_json({'ids': _ids(getattr(data, entity), rng, 500)}))
+
+
+def _word(data: Dataset, rng: random.Random) -> str:
+    return rng.choice(rng.choice(data.organizations)['name'].split())
+
+
+@dataclass
+class Scenario:
+    build: Callable[[Dataset, random.Random], Call | None]
+    writes: bool = False
+    share: float = 1.0
+    record: Callable[[Dataset, bytes], None] | None = None
+
+
+# keyed by "METHOD path" of every route in app/adapters/routers; routes missing here are
+# reported as skipped so that new endpoints show up in the results instead of going unnoticed
+SCENARIOS = {
+    'GET /secunda/organizations/': Scenario(lambda data, rng: Call(query={'limit': 100})),
+    'GET /secunda/organizations/search': Scenario(
+        lambda data, rng: Call(query={'name': _word(data, rng), 'limit': 20})
+    ),
+    'GET /secunda/organizations/suggest': Scenario(
+        lambda data, rng: Call(query={'prefix': _word(data, rng)[:3]})
+    ),
+    'GET /secunda/organizations/export': Scenario(lambda data, rng: Call(), share=0.02),
+    'GET /secunda/organizations/by_building/{building_id}': Scenario(
+        lambda data, rng: Call(params={'building_id': rng.choice(data.buildings)['id']})
+    ),
+    'GET /secunda/organizations/by_activity/{activity_id}': Scenario(
+        lambda data, rng: Call(params={'activity_id': rng.choice(data.activities)['id']})
+    ),
+    'GET /secunda/organizations/by_radius': Scenario(_radius),
+    'GET /secunda/organizations/nearest': Scenario(_nearest),
+    'GET /secunda/organizations/by_rectangle': Scenario(_rectangle),
+    'GET /secunda/organizations/batch': Scenario(_batch('organizations')),
+    'POST /secunda/organizations/batch': Scenario(_batch_body('organizations')),
+    'GET /secunda/organizations/{org_id}': Scenario(
+        lambda data, rng: Call(params={'org_id': rng.choice(data.organizations)['id']})
+    ),
+    'GET /secunda/buildings/': Scenario(lambda data, rng: Call(), share=0.1),
+    'GET /secunda/buildings/batch': Scenario(_batch('buildings')),
+    'POST /secunda/buildings/batch': Scenario(_batch_body('buildings')),
+    'GET /secunda/buildings/{building_id}': Scenario(
+        lambda data, rng: Call(params={'building_id': rng.choice(data.buildings)['id']})
+    ),
+    'GET /secunda/activities/': Scenario(lambda data, rng: Call(), share=0.1),
+    'GET /secunda/activities/batch': Scenario(_batch('activities')),
+    'POST /secunda/activities/batch': Scenario(_batch_body('activities')),
+    'GET /secunda/activities/{activity_id}': Scenario(
+        lambda data, rng: Call(params={'activity_id': rng.choice(data.activities)['id']})
+    ),
+    'GET /secunda/system/cache': Scenario(lambda data, rng: Call()),
+    'GET /secunda/system/pool': Scenario(lambda data, rng: Call()),
+    'GET /secunda/system/replicas': Scenario(lambda data, rng: Call()),
+    'POST /secunda/organizations/': Scenario(
+        lambda data, rng: Call(**_json(data.organization_body(rng))),
+        writes=True,
+        record=_remember('organizations'),
+    ),
+    'POST /secunda/buildings/': Scenario(
+        lambda data, rng: Call(
+            **_json(
+                {
+                    'address': data.unique('Бенчмарк, д.'),
+                    'latitude': _point(data, rng)[0],
+                    'longitude': _point(data, rng)[1],
+                }
+            )
+        ),
+        writes=True,
+        record=_remember('buildings'),
+    ),
+    'POST /secunda/activities/': Scenario(
+        lambda data, rng: Call(**_json({'name': data.unique('Бенчмарк')})),
+        writes=True,
+        record=_remember('activities'),
+    ),
+    'POST /secunda/import/buildings': Scenario(
+        lambda data, rng: Call(
+            query={'format': 'ndjson'},
+            **_ndjson(
+                [
+                    {
+                        'address': data.unique('Импорт, д.'),
+                        'latitude': _point(data, rng)[0],
+                        'longitude': _point(data, rng)[1],
+                    }
+                    for _ in range(100)
+                ]
+            ),
+        ),
+        writes=True,
+        share=0.1,
+    ),
+    'POST /secunda/import/activities': Scenario(
+        lambda data, rng: Call(
+            query={'format': 'ndjson'},
+            **_ndjson([{'name': data.unique('Импорт')} for _ in range(10)]),
+        ),
+        writes=True,
+        share=0.1,
+    ),
+    'POST /secunda/import/organizations': Scenario(
+        lambda data, rng: Call(
+            query={'format': 'ndjson'},
+            **_ndjson([data.organization_body(rng) for _ in range(100)]),
+        ),
+        writes=True,
+        share=0.1,
+    ),
+    'PUT /secunda/organizations/{org_id}': Scenario(
+        _update('organizations', 'org_id', lambda data, rng: {'name': data.unique('ООО')}),
+        writes=True,
+    ),
+    'PUT /secunda/buildings/{building_id}': Scenario(
+        _update('buildings', 'building_id', lambda data, rng: {'latitude': _point(data, rng)[0]}),
+        writes=True,
+    ),
+    'PUT /secunda/activities/{activity_id}': Scenario(
+        _update('activities', 'activity_id', lambda data, rng: {'name': data.unique('Бенчмарк')}),
+        writes=True,
+    ),
+    'DELETE /secunda/organizations/{org_id}': Scenario(
+        _delete('organizations', 'org_id'), writes=True
+    ),
+    'DELETE /secunda/buildings/{building_id}': Scenario(
+        _delete('buildings', 'building_id'), writes=True
+    ),
+    'DELETE /secunda/activities/{activity_id}': Scenario(
+        _delete('activities', 'activity_id'), writes=True
+    ),
+}
+
+
+def routes() -> List[tuple[str, str]]:
+    found = {
+        (method, route.path)
+        for route in router.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    return sorted(found, key=lambda item: (METHOD_ORDER.get(item[0], 9), item[1]))
+
+
+def rss_mb(pid: int | None) -> float | None:
+    if pid is None:
+        return None
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+async def load_dataset(client: httpx.AsyncClient, sample: int) -> Dataset:
+    async def get(path: str) -> list | dict:
+        response = await client.get(path)
+        if response.status_code != 200:
+            raise SystemExit(f'GET {path}: {response.status_code} {response.content[:200]!r}')
+        return response.json()
+
+    buildings = await get('/secunda/buildings/')
+    activities = await get('/secunda/activities/')
+    organizations, cursor = [], None
+    while len(organizations) < sample:
+        query = {'limit': min(1000, sample - len(organizations))}
+        if cursor:
+            query['cursor'] = cursor
+        page = await get(f'/secunda/organizations/?{urlencode(query)}')
+        organizations.extend(
+            {'id': org['id'], 'name': org['name']} for org in page['items']
+        )
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+    if not (buildings and activities and organizations):
+        raise SystemExit('Нет данных: сначала запустите benchmarks/generate.py')
+    return Dataset(buildings, activities, organizations)
+
+
+async def run_scenario(
+    args: argparse.Namespace,
+    client: httpx.AsyncClient,
+    data: Dataset,
+    method: str,
+    path: str,
+    scenario: Scenario,
+) -> dict:
+    rng = random.Random(args.seed)
+    total = max(1, round(args.requests * scenario.share))
+    latencies: List[float] = []
+    statuses: dict[int, int] = {}
+    remaining = total
+    rss = [rss_mb(args.pid)]
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            call = scenario.build(data, rng)
+            if call is None:
+                break
+            target = path.format(**call.params)
+            if call.query:
+                target += '?' + urlencode(call.query)
+            headers = {'Content-Type': call.content_type} if call.content_type else None
+            started = time.perf_counter()
+            response = await client.request(
+                method, target, content=call.body or None, headers=headers
+            )
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if scenario.record is not None and response.status_code < 300:
+                scenario.record(data, response.content)
+
+    async def sample_rss() -> None:
+        while True:
+            await asyncio.sleep(0.05)
+            rss.append(rss_mb(args.pid))
+
+    sampler = asyncio.create_task(sample_rss())
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(args.concurrency, total))))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+    rss.append(rss_mb(args.pid))
+
+    result = {
+        'method': method,
+        'path': path,
+        'requests': len(latencies),
+        'errors': sum(count for status, count in statuses.items() if status >= 400),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'rss_mb': None,
+    }
+    if latencies:
+        ms = np.array(latencies) * 1000
+        result.update(
+            {
+                'mean_ms': round(float(ms.mean()), 3),
+                'p50_ms': round(float(np.percentile(ms, 50)), 3),
+                'p95_ms': round(float(np.percentile(ms, 95)), 3),
+                'p99_ms': round(float(np.percentile(ms, 99)), 3),
+                'max_ms': round(float(ms.max()), 3),
+            }
+        )
+    if args.pid is not None:
+        result['rss_mb'] = {
+            'start': round(rss[0], 1),
+            'end': round(rss[-1], 1),
+            'peak': round(max(rss), 1),
+        }
+    return result
+
+
+def commit() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[dict], baseline_path: Path) -> None:
+    baseline = {
+        (item['method'], item['path']): item
+        for item in json.loads(baseline_path.read_text())['results']
+    }
+    print(f'\ncompared with {baseline_path}:')
+    for item in results:
+        before = baseline.get((item['method'], item['path']))
+        if not before or 'p50_ms' not in before or 'p50_ms' not in item:
+            continue
+        deltas = '  '.join(
+            f'{key[:3]} {(item[key] - before[key]) / before[key] * 100:+6.1f}%'
+            for key in ('p50_ms', 'p95_ms', 'p99_ms')
+            if before[key]
+        )
+        print(f'{item["method"]:<6} {item["path"]:<55} {deltas}')
+
+
+async def benchmark(args: argparse.Namespace) -> None:
+    # one keep-alive connection per worker, as many workers as --concurrency
+    async with httpx.AsyncClient(
+        base_url=args.base_url,
+        headers={'X-API-Key': args.api_key},
+        limits=httpx.Limits(
+            max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+        ),
+        timeout=args.timeout,
+    ) as client:
+        await run_all(args, client)
+
+
+async def run_all(args: argparse.Namespace, client: httpx.AsyncClient) -> None:
+    data = await load_dataset(client, args.sample)
+
+    results, skipped = [], []
+    for method, path in routes():
+        name = f'{method} {path}'
+        scenario = SCENARIOS.get(name)
+        if args.only and not any(part in path for part in args.only):
+            continue
+        if scenario is None:
+            skipped.append({'method': method, 'path': path, 'reason': 'no scenario'})
+            continue
+        if scenario.writes and not args.writes:
+            skipped.append({'method': method, 'path': path, 'reason': 'writes disabled'})
+            continue
+
+        if args.warmup:
+            warmup = argparse.Namespace(**dict(vars(args), requests=args.warmup))
+            await run_scenario(warmup, client, data, method, path, scenario)
+        result = await run_scenario(args, client, data, method, path, scenario)
+        results.append(result)
+        print(
+            f'{method:<6} {path:<55} p50 {result.get("p50_ms", 0):8.2f}  '
+            f'p95 {result.get("p95_ms", 0):8.2f}  p99 {result.get("p99_ms", 0):8.2f} ms  '
+            f'{result["throughput_rps"] or 0:8.1f} rps  errors {result["errors"]}'
+        )
+
+    report = {
+        'meta': {
+            'started_at': args.started_at,
+            'commit': commit(),
+            'base_url': args.base_url,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'warmup': args.warmup,
+            'writes': args.writes,
+            'seed': args.seed,
+            'server_pid': args.pid,
+            'python': platform.python_version(),
+            'dataset': {
+                'buildings': len(data.buildings),
+                'activities': len(data.activities),
+                'organizations_sampled': len(data.organizations),
+            },
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+    print(f'\nresults written to {args.output}')
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+def main():
+    started_at = datetime.now(timezone.utc)
+    parser = argparse.ArgumentParser(description='Нагрузочный прогон всех маршрутов API')
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--api-key', default=settings.API_KEY)
+    parser.add_argument('--requests', type=int, default=500, help='запросов на маршрут')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--timeout', type=float, default=60.0, help='таймаут запроса, с')
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--sample', type=int, default=5000, help='организаций для выборки id')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--pid', type=int, default=None, help='pid сервера для замера RSS')
+    parser.add_argument('--writes', action='store_true', help='включить изменяющие маршруты')
+    parser.add_argument('--only', nargs='*', help='подстроки путей для выборочного прогона')
+    parser.add_argument(
+        '--output',
+        type=Path,
+        default=Path(f'benchmark-{started_at:%Y%m%dT%H%M%S}.json'),
+    )
+    parser.add_argument('--baseline', type=Path, default=None, help='JSON прошлого прогона')
+    args = parser.parse_args()
+    args.started_at = started_at.isoformat()
+    asyncio.run(benchmark(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+import argparse
+import asyncio
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import AsyncIterator, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text
+
+from app.domain.entities import (
+    Activity,
+    ActivityClosure,
+    Building,
+    Organization,
+    OrganizationActivity,
+)
+from app.infrastructure.database import AsyncSessionLocal
+from app.infrastructure.di import create_import_service
+from app.settings import settings
+
+# name, latitude, longitude, share of buildings, spread of the city in km
+CITIES = [
+    ('Москва', 55.7558, 37.6173, 0.35, 18.0),
+    ('Санкт-Петербург', 59.9386, 30.3141, 0.2, 14.0),
+    ('Новосибирск', 55.0302, 82.9204, 0.1, 10.0),
+    ('Екатеринбург', 56.8380, 60.5975, 0.1, 9.0),
+    ('Казань', 55.7961, 49.1064, 0.08, 8.0),
+    ('Нижний Новгород', 56.3269, 44.0059, 0.07, 8.0),
+    ('Краснодар', 45.0355, 38.9753, 0.05, 7.0),
+    ('Владивосток', 43.1155, 131.8855, 0.05, 6.0),
+]
+STREETS = [
+    'Ленина', 'Мира', 'Гагарина', 'Советская', 'Садовая', 'Центральная', 'Молодёжная',
+    'Школьная', 'Лесная', 'Набережная', 'Заводская', 'Пушкина', 'Кирова', 'Победы',
+]
+SECTORS = [
+    'Еда', 'Автомобили', 'Строительство', 'Медицина', 'Образование', 'Транспорт',
+    'Одежда', 'Электроника', 'Финансы', 'Туризм', 'Спорт', 'Развлечения',
+]
+FORMS = ['ООО', 'АО', 'ИП', 'ПАО']
+WORDS = [
+    'Альфа', 'Вектор', 'Гранит', 'Дельта', 'Заря', 'Импульс', 'Квант', 'Лидер', 'Меридиан',
+    'Орион', 'Прогресс', 'Рассвет', 'Сфера', 'Титан', 'Феникс', 'Эталон', 'Рога и Копыта',
+]
+
+
+async def _rows(records: List[dict]) -> AsyncIterator[tuple[int, dict]]:
+    for row in enumerate(records, start=1):
+        yield row
+
+
+def make_buildings(rng: random.Random, count: int) -> List[dict]:
+    cities = rng.choices(CITIES, weights=[city[3] for city in CITIES], k=count)
+    buildings = []
+    for number, (city, latitude, longitude, _, spread) in enumerate(cities, start=1):
+        lat = latitude + rng.gauss(0, spread) / 111.32
+        lon = longitude + rng.gauss(0, spread) / (111.32 * math.cos(math.radians(latitude)))
+        buildings.append(
+            {
+                'address': f'г. {city}, ул. {rng.choice(STREETS)}, д. {number}',
+                'latitude': round(lat, 6),
+                'longitude': round(lon, 6),
+            }
+        )
+    return buildings
+
+
+def make_activities(roots: int, branching: int, depth: int) -> List[dict]:
+    level = [
+        {
+            'name': SECTORS[i] if i < len(SECTORS) else f'Отрасль {i + 1}',
+            'parent_id': None,
+            'parent_name': None,
+        }
+        for i in range(roots)
+    ]
+    activities = list(level)
+    for _ in range(depth - 1):
+        level = [
+            {
+                'name': f'{parent["name"]} / {child + 1}',
+                'parent_id': None,
+                'parent_name': parent['name'],
+            }
+            for parent in level
+            for child in range(branching)
+        ]
+        activities.extend(level)
+    return activities
+
+
+def make_organizations(
+    rng: random.Random, count: int, buildings: List[dict], activities: List[dict]
+) -> List[dict]:
+    names = [activity['name'] for activity in activities]
+    organizations = []
+    for number in range(1, count + 1):
+        # quadratic skew: a few buildings host many organizations, as business centres do
+        building = buildings[int(len(buildings) * rng.random() ** 2)]
+        organizations.append(
+            {
+                'name': f'{rng.choice(FORMS)} «{rng.choice(WORDS)} {number}»',
+                'phones': [
+                    f'+79{rng.randrange(10 ** 9):09d}' for _ in range(rng.randint(1, 2))
+                ],
+                'building_id': None,
+                'building_address': building['address'],
+                'activity_ids': [],
+                'activity_names': rng.sample(names, k=min(len(names), rng.randint(1, 3))),
+            }
+        )
+    return organizations
+
+
+async def reset() -> None:
+    tables = [
+        OrganizationActivity.__tablename__,
+        Organization.__tablename__,
+        ActivityClosure.__tablename__,
+        Activity.__tablename__,
+        Building.__tablename__,
+    ]
+    async with AsyncSessionLocal() as session:
+        await session.execute(text(f'TRUNCATE {", ".join(tables)} RESTART IDENTITY CASCADE'))
+        await session.commit()
+
+
+async def analyze() -> None:
+    async with AsyncSessionLocal() as session:
+        await session.execute(text('ANALYZE'))
+        await session.commit()
+
+
+async def generate(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    depth = args.depth or settings.ACTIVITY_MAX_DEPTH
+    buildings = make_buildings(rng, args.buildings)
+    activities = make_activities(args.roots, args.branching, depth)
+    organizations = make_organizations(rng, args.organizations, buildings, activities)
+
+    if args.reset:
+        await reset()
+
+    steps = [
+        ('buildings', lambda service: service.import_buildings(_rows(buildings))),
+        ('activities', lambda service: service.import_activities(_rows(activities))),
+        ('organizations', lambda service: service.import_organizations(_rows(organizations))),
+    ]
+    for entity, load in steps:
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as session:
+            result = await load(create_import_service(session, args.batch_size))
+        elapsed = time.perf_counter() - started
+        errors = result.errors
+        print(
+            f'{entity:<14} imported {result.imported:>8}  rejected {len(errors):>6}  '
+            f'{elapsed:7.2f} s'
+        )
+        for row, error in errors[:10]:
+            print(f'  row {row}: {error}')
+
+    await analyze()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генерация синтетического набора данных')
+    parser.add_argument('--buildings', type=int, default=10000)
+    parser.add_argument('--organizations', type=int, default=100000)
+    parser.add_argument('--roots', type=int, default=len(SECTORS))
+    parser.add_argument('--branching', type=int, default=6)
+    parser.add_argument('--depth', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=settings.IMPORT_BATCH_SIZE)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--reset', action='store_true', help='очистить таблицы перед загрузкой')
+    asyncio.run(generate(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.adapters.schemas.organization import (
+    OrganizationDistancePageSchema,
+    OrganizationDistanceSchema,
+    OrganizationPageSchema,
+)
+from app.adapters.serialization import JSONProjection
+from app.services.pagination import Page
+
+
+def make_documents(count: int, activities: int) -> List[dict]:
+    rng = random.Random(42)
+    documents = []
+    for org_id in range(1, count + 1):
+        building_id = rng.randint(1, 1000)
+        documents.append(
+            {
+                'name': f'ООО «Организация {org_id}»',
+                'phones': ['+79991234567', '8-923-666-13-13'],
+                'building_id': building_id,
+                'id': org_id,
+                'building': {
+                    'address': f'г. Москва, ул. Ленина {building_id}',
+                    'latitude': round(rng.uniform(55.5, 56.0), 6),
+                    'longitude': rng.choice([37, round(rng.uniform(37.3, 37.9), 6)]),
+                    'id': building_id,
+                },
+                'activities': [
+                    {'name': f'Деятельность {n}', 'parent_id': n // 3 or None, 'id': n}
+                    for n in rng.sample(range(1, 60), activities)
+                ],
+                'distance_km': rng.uniform(0, 25),
+                'similarity': rng.random(),
+            }
+        )
+    return documents
+
+
+def fastapi_encode(loop, field, content) -> bytes:
+    payload = loop.run_until_complete(serialize_response(field=field, response_content=content))
+    return JSONResponse(payload).body
+
+
+def measure(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Сравнение сериализации ответов со списками')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--activities', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    documents = make_documents(args.count, args.activities)
+    cases = [
+        ('page', OrganizationPageSchema, Page(items=documents, next_cursor='WzEwMDBd')),
+        ('distance page', OrganizationDistancePageSchema, Page(items=documents)),
+        ('nearest', List[OrganizationDistanceSchema], documents),
+    ]
+    for title, schema, content in cases:
+        field = create_response_field(name='Response', type_=schema)
+        projection = JSONProjection(schema)
+        expected = fastapi_encode(loop, field, content)
+        assert projection.encode(content) == expected, f'{title}: ответы различаются'
+
+        baseline = measure(lambda: fastapi_encode(loop, field, content), args.repeat)
+        fast = measure(lambda: projection.encode(content), args.repeat)
+        print(
+            f'{title:<14} {len(expected):>9} B  fastapi {baseline * 1000:8.2f} ms  '
+            f'projection {fast * 1000:8.2f} ms  x{baseline / fast:.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from app.adapters.importing import ImportFormat, RecordValidator, read_records
+from app.adapters.schemas.imports import (
+    ActivityImportSchema,
+    BuildingImportSchema,
+    OrganizationImportSchema,
+)
+from app.infrastructure.database import AsyncSessionLocal
+from app.infrastructure.di import create_import_service
+
+SCHEMAS = {
+    'buildings': BuildingImportSchema,
+    'activities': ActivityImportSchema,
+    'organizations': OrganizationImportSchema,
+}
+
+
+async def read_lines(path: Path):
+    with path.open(encoding='utf-8-sig', newline='') as file:
+        for line in file:
+            yield line
+
+
+async def import_data(entity: str, path: Path, import_format: ImportFormat):
+    validator = RecordValidator(SCHEMAS[entity])
+    rows = validator(read_records(read_lines(path), import_format))
+
+    async with AsyncSessionLocal() as session:
+        service = create_import_service(session)
+        if entity == 'buildings':
+            result = await service.import_buildings(rows)
+        elif entity == 'activities':
+            result = await service.import_activities(rows)
+        else:
+            result = await service.import_organizations(rows)
+
+    errors = sorted(validator.errors + result.errors)
+    for row, error in errors:
+        print(f'row {row}: {error}')
+    print(
+        f'Rows: {validator.total}, imported: {result.imported}, '
+        f'updated: {result.updated}, rejected: {len(errors)}'
+    )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk import of directory data')
+    parser.add_argument('entity', choices=list(SCHEMAS))
+    parser.add_argument('path', type=Path)
+    parser.add_argument('--format', choices=[item.value for item in ImportFormat])
+    args = parser.parse_args()
+
+    import_format = ImportFormat(
+        args.format or ('csv' if args.path.suffix.lower() == '.csv' else 'ndjson')
+    )
+    asyncio.run(import_data(args.entity, args.path, import_format))
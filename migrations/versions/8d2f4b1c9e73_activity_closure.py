@@ -0,0 +1,64 @@
+"""activity closure
+
+Revision ID: 8d2f4b1c9e73
+Revises: 57c5732c6a82
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = '8d2f4b1c9e73'
+down_revision: Union[str, None] = '57c5732c6a82'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'activity_closure',
+        sa.Column('ancestor_id', sa.Integer(), nullable=False),
+        sa.Column('descendant_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['activities.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['descendant_id'], ['activities.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    )
+    with op.batch_alter_table('activity_closure', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_activity_closure_descendant_id'), ['descendant_id'], unique=False
+        )
+
+    with op.batch_alter_table('organization_activity', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_organization_activity_activity_id'), ['activity_id'], unique=False
+        )
+
+    op.execute(
+        """
+        WITH RECURSIVE activity_tree(ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM activities
+            UNION ALL
+            SELECT activity_tree.ancestor_id, activities.id, activity_tree.depth + 1
+            FROM activity_tree
+            JOIN activities ON activities.parent_id = activity_tree.descendant_id
+        )
+        INSERT INTO activity_closure (ancestor_id, descendant_id, depth)
+        SELECT ancestor_id, descendant_id, depth FROM activity_tree
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('organization_activity', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_organization_activity_activity_id'))
+
+    with op.batch_alter_table('activity_closure', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_activity_closure_descendant_id'))
+
+    op.drop_table('activity_closure')
@@ -0,0 +1,67 @@
+"""table versions
+
+Revision ID: a3d81f6c2b47
+Revises: f7c2e8a41d96
+Create Date: 2026-10-18 15:04:18.902513
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = 'a3d81f6c2b47'
+down_revision: Union[str, None] = 'f7c2e8a41d96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table the trigger is attached to -> table_versions row it bumps
+TRIGGERS = {
+    'organizations': 'organizations',
+    'organization_activity': 'organizations',
+    'buildings': 'buildings',
+    'activities': 'activities',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'table_versions',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('table_name'),
+    )
+    op.execute(
+        """
+        INSERT INTO table_versions (table_name, version)
+        VALUES ('organizations', 0), ('buildings', 0), ('activities', 0)
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = TG_ARGV[0];
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table, versioned in TRIGGERS.items():
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version('{versioned}')
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_version ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS bump_table_version()')
+    op.drop_table('table_versions')
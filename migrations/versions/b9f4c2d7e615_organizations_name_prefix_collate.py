@@ -0,0 +1,39 @@
+"""organizations name prefix collate
+
+Revision ID: b9f4c2d7e615
+Revises: a3d81f6c2b47
+Create Date: 2026-10-18 18:04:27.318204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = 'b9f4c2d7e615'
+down_revision: Union[str, None] = 'a3d81f6c2b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index('ix_organizations_name_prefix', table_name='organizations')
+    op.create_index(
+        'ix_organizations_name_prefix',
+        'organizations',
+        [sa.text('lower(name) COLLATE "C"'), 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_organizations_name_prefix', table_name='organizations')
+    op.create_index(
+        'ix_organizations_name_prefix',
+        'organizations',
+        [sa.text('lower(name) text_pattern_ops')],
+        unique=False,
+    )
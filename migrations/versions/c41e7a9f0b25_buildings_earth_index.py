@@ -0,0 +1,37 @@
+"""buildings earth index
+
+Revision ID: c41e7a9f0b25
+Revises: 8d2f4b1c9e73
+Create Date: 2026-10-18 11:03:27.904512
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = 'c41e7a9f0b25'
+down_revision: Union[str, None] = '8d2f4b1c9e73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS cube')
+    op.execute('CREATE EXTENSION IF NOT EXISTS earthdistance')
+    op.create_index(
+        'ix_buildings_earth',
+        'buildings',
+        [sa.text('ll_to_earth(latitude, longitude)')],
+        unique=False,
+        postgresql_using='gist',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_buildings_earth', table_name='buildings', postgresql_using='gist')
+    op.execute('DROP EXTENSION IF EXISTS earthdistance')
+    op.execute('DROP EXTENSION IF EXISTS cube')
@@ -0,0 +1,76 @@
+"""table versions deferred
+
+Revision ID: d2a7e9c4f318
+Revises: b9f4c2d7e615
+Create Date: 2026-10-18 18:41:09.527361
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = 'd2a7e9c4f318'
+down_revision: Union[str, None] = 'b9f4c2d7e615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table the trigger is attached to -> table_versions row it bumps
+TRIGGERS = {
+    'organizations': 'organizations',
+    'organization_activity': 'organizations',
+    'buildings': 'buildings',
+    'activities': 'activities',
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The version row used to be updated by every write statement, so its lock was held until
+    # commit and serialized all writers of a table, imports included. The bump is now a
+    # deferred constraint trigger: it runs once per transaction and table, at commit, and the
+    # row lock lasts only from there to the end of the commit.
+    op.execute(
+        """
+        CREATE FUNCTION queue_table_version(versioned text) RETURNS boolean AS $$
+            SELECT current_setting('table_versions.queued_' || versioned, true)
+                    IS DISTINCT FROM 'on'
+                AND set_config('table_versions.queued_' || versioned, 'on', true) = 'on'
+        $$ LANGUAGE sql VOLATILE
+        """
+    )
+    for table, versioned in TRIGGERS.items():
+        op.execute(f'DROP TRIGGER {table}_version ON {table}')
+        # the WHEN clause lets only the transaction's first row event into the queue
+        op.execute(
+            f"""
+            CREATE CONSTRAINT TRIGGER {table}_version
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            DEFERRABLE INITIALLY DEFERRED
+            FOR EACH ROW WHEN (queue_table_version('{versioned}'))
+            EXECUTE FUNCTION bump_table_version('{versioned}')
+            """
+        )
+        # constraint triggers cannot fire on TRUNCATE, which locks the whole table anyway
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_version_truncate
+            AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version('{versioned}')
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, versioned in TRIGGERS.items():
+        op.execute(f'DROP TRIGGER {table}_version_truncate ON {table}')
+        op.execute(f'DROP TRIGGER {table}_version ON {table}')
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version('{versioned}')
+            """
+        )
+    op.execute('DROP FUNCTION queue_table_version(text)')
@@ -0,0 +1,30 @@
+"""organizations building index
+
+Revision ID: e5a9d3b7c180
+Revises: c41e7a9f0b25
+Create Date: 2026-10-18 11:48:09.115630
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = 'e5a9d3b7c180'
+down_revision: Union[str, None] = 'c41e7a9f0b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('organizations', schema=None) as batch_op:
+        batch_op.create_index(
+            batch_op.f('ix_organizations_building_id'), ['building_id'], unique=False
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('organizations', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_organizations_building_id'))
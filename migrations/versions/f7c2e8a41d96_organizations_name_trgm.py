@@ -0,0 +1,43 @@
+"""organizations name trgm
+
+Revision ID: f7c2e8a41d96
+Revises: e5a9d3b7c180
+Create Date: 2026-10-18 13:26:52.640781
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = 'f7c2e8a41d96'
+down_revision: Union[str, None] = 'e5a9d3b7c180'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_organizations_name_trgm',
+        'organizations',
+        ['name'],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_organizations_name_prefix',
+        'organizations',
+        [sa.text('lower(name) text_pattern_ops')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_organizations_name_prefix', table_name='organizations')
+    op.drop_index('ix_organizations_name_trgm', table_name='organizations')
+    op.execute('DROP EXTENSION IF EXISTS pg_trgm')
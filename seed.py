@@ -2,6 +2,7 @@ import asyncio
 
 from app.domain.entities import Activity, Base, Building, Organization, OrganizationActivity
 from app.infrastructure.database import AsyncSessionLocal, engine
+from app.infrastructure.repositories.activity import ActivityRepository
 from app.infrastructure.repositories.organization import OrganizationRepository
 
 
@@ -32,6 +33,7 @@ async def seed_data():
             activity6 = Activity(name='Аксессуары', parent_id=activity2.id)
             session.add_all([activity3, activity4, activity5, activity6])
             await session.flush()
+            await ActivityRepository(session).rebuild_closure()
 
             organization = Organization(
                 name='ООО Рога и Копыта', phones=['+79991234567'], building_id=building1.id